@@ -11,8 +11,12 @@ import subprocess
 import json
 import time
 import os
-from typing import Dict, List, Tuple
+import re
+import uuid
+import argparse
+from typing import Dict, List, Optional, Tuple
 import random
+from time_budget import CensoredTime, TimeBudget, MYSQL_TIMEOUT_ERRNOS, KILL_GRACE_SECONDS, format_improvement
 
 class DockerMySQLPerformanceTester:
     def __init__(self, container_name='prog8850-assignment5-db-1', user='root', password='Secret5555', database='ecommerce_db'):
@@ -21,9 +25,22 @@ class DockerMySQLPerformanceTester:
         self.user = user
         self.password = password
         self.database = database
+        self.time_budget = TimeBudget()
         
-    def execute_sql(self, query: str, fetch_results: bool = True) -> List[Tuple]:
-        """Execute SQL query using docker exec"""
+    def execute_sql(self, query: str, fetch_results: bool = True, timeout: Optional[float] = None) -> List[Tuple]:
+        """Execute SQL query using docker exec
+        
+        With timeout, the session's MAX_EXECUTION_TIME stops a SELECT inside
+        the server; any statement still running once the docker exec call is
+        abandoned (timeout plus a grace period) is found by its tag comment
+        and stopped with KILL QUERY. Both raise subprocess.TimeoutExpired.
+        """
+        tag = None
+        statement = query
+        if timeout:
+            tag = uuid.uuid4().hex
+            statement = (f"SET SESSION MAX_EXECUTION_TIME = {max(1, int(timeout * 1000))}; "
+                         f"/* harness:{tag} */ {query}")
         try:
             # Escape quotes in the query
             escaped_query = query.replace('"', '\\"').replace("'", "\\'")
@@ -31,11 +48,12 @@ class DockerMySQLPerformanceTester:
             cmd = [
                 'docker', 'exec', '-i', self.container_name,
                 'mysql', '-u', self.user, f'-p{self.password}',
-                '-D', self.database,
-                '-e', query
+                '-D', self.database, '--comments',
+                '-e', statement
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True,
+                                    timeout=timeout + KILL_GRACE_SECONDS if timeout else None)
             
             if fetch_results and result.stdout:
                 # Parse the output - skip the header line and split by tabs
@@ -49,13 +67,31 @@ class DockerMySQLPerformanceTester:
                 return []
             return []
             
+        except subprocess.TimeoutExpired:
+            self._kill_tagged_query(tag)
+            raise
         except subprocess.CalledProcessError as e:
+            timeout_errors = '|'.join(str(errno) for errno in MYSQL_TIMEOUT_ERRNOS)
+            if timeout and re.search(rf"ERROR ({timeout_errors})\b", e.stderr or ''):
+                raise subprocess.TimeoutExpired(cmd, timeout)
             print(f"❌ Error executing query: {e.stderr}")
             return []
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
             return []
     
+    def _kill_tagged_query(self, tag: str):
+        """KILL QUERY the statement carrying a harness tag comment"""
+        rows = self.execute_sql(f"SELECT ID FROM performance_schema.processlist "
+                                f"WHERE INFO LIKE '%harness:{tag}%' AND ID <> CONNECTION_ID()")
+        for (process_id,) in rows:
+            self.execute_sql(f"KILL QUERY {process_id}", fetch_results=False)
+            print(f"🛑 Killed runaway query (connection {process_id})")
+    
+    def set_time_budget(self, query_timeout: Optional[float] = None, suite_timeout: Optional[float] = None):
+        """Limit every timed query to query_timeout seconds and all of them together to suite_timeout"""
+        self.time_budget = TimeBudget(query_timeout, suite_timeout)
+    
     def connect(self):
         """Test connection"""
         try:
@@ -187,11 +223,22 @@ class DockerMySQLPerformanceTester:
         print(f"   - {item_count} order items")
         print(f"   - 800 reviews")
     
-    def time_query(self, query: str, description: str) -> float:
-        """Execute a query and measure execution time"""
+    def time_query(self, query: str, description: str, timeout: Optional[float] = None) -> float:
+        """Execute a query and measure execution time
+        
+        The query is limited to timeout seconds (default: what the time budget
+        allows); a query stopped at the limit returns a CensoredTime, and once
+        the suite budget is spent queries are skipped and return CensoredTime(0).
+        """
+        if timeout is None:
+            timeout = self.time_budget.next_timeout()
+        if timeout is not None and timeout <= 0:
+            print(f"⏭️  Skipped {description}: suite time budget exhausted")
+            return CensoredTime(0.0, 'suite budget exhausted')
+        
         start_time = time.time()
         try:
-            results = self.execute_sql(query, fetch_results=True)
+            results = self.execute_sql(query, fetch_results=True, timeout=timeout)
             end_time = time.time()
             execution_time = end_time - start_time
             
@@ -202,6 +249,12 @@ class DockerMySQLPerformanceTester:
             print()
             
             return execution_time
+        except subprocess.TimeoutExpired:
+            elapsed = time.time() - start_time
+            print(f"⏳ {description}")
+            print(f"   Stopped after {elapsed:.4f} seconds (limit {timeout:.2f}s); recorded as censored")
+            print()
+            return CensoredTime(elapsed)
         except Exception as err:
             print(f"❌ Error executing query: {err}")
             return -1
@@ -338,30 +391,37 @@ class DockerMySQLPerformanceTester:
             before_time = scalar_before[test_name]
             after_time = scalar_after[test_name]
             if before_time > 0 and after_time > 0:
-                improvement = ((before_time - after_time) / before_time) * 100
                 print(f"  {test_name}:")
                 print(f"    Before: {before_time:.4f}s, After: {after_time:.4f}s")
-                print(f"    Improvement: {improvement:+.2f}%")
+                print(f"    Improvement: {format_improvement(before_time, after_time)}")
         
         print("\nFull-Text Search Queries:")
         for test_name in fulltext_before:
             before_time = fulltext_before[test_name]
             after_time = fulltext_after[test_name]
             if before_time > 0 and after_time > 0:
-                improvement = ((before_time - after_time) / before_time) * 100
                 print(f"  {test_name}:")
                 print(f"    Before: {before_time:.4f}s, After: {after_time:.4f}s")
-                print(f"    Improvement: {improvement:+.2f}%")
+                print(f"    Improvement: {format_improvement(before_time, after_time)}")
 
 
 def main():
     """Main function to run the performance testing"""
+    parser = argparse.ArgumentParser(description="Docker MySQL e-commerce performance tester")
+    parser.add_argument('--query-timeout', type=float,
+                        help="Seconds a timed query may run before it is cancelled and recorded as censored")
+    parser.add_argument('--suite-timeout', type=float,
+                        help="Seconds for all timed queries together; later queries are skipped")
+    args = parser.parse_args()
+    
     print("🏪 Brazilian E-commerce Database Performance Analysis")
     print("🎯 Assignment 5 - PROG8850 (Docker MySQL Version)")
     print("=" * 60)
     
     # Initialize the tester
     tester = DockerMySQLPerformanceTester()
+    if args.query_timeout or args.suite_timeout:
+        tester.set_time_budget(args.query_timeout, args.suite_timeout)
     
     # Connect to database
     if not tester.connect():
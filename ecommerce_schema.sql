@@ -14,6 +14,7 @@ DROP TABLE IF EXISTS product_category_name_translation;
 DROP TABLE IF EXISTS sellers;
 DROP TABLE IF EXISTS customers;
 DROP TABLE IF EXISTS geolocation;
+DROP TABLE IF EXISTS geolocation_centroids;
 
 -- Customers table
 CREATE TABLE customers (
@@ -112,3 +113,13 @@ CREATE TABLE geolocation (
     geolocation_city VARCHAR(50),
     geolocation_state VARCHAR(2)
 );
+
+-- Geolocation centroids: one row per zip code prefix, collapsed from geolocation by the loader
+CREATE TABLE geolocation_centroids (
+    geolocation_zip_code_prefix INT PRIMARY KEY,
+    geolocation_lat DECIMAL(10,8),
+    geolocation_lng DECIMAL(11,8),
+    geolocation_city VARCHAR(50),
+    geolocation_state VARCHAR(2),
+    sample_count INT
+);
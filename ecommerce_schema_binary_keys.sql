@@ -0,0 +1,131 @@
+-- Brazilian E-commerce Database Schema (BINARY(16) key variant)
+-- Assignment 5 - Database Indexing and Performance
+--
+-- Same tables as ecommerce_schema.sql, but customer_id, order_id, product_id,
+-- seller_id and review_id are stored as 16 raw bytes instead of 32 hex
+-- characters. The loader decodes the hex ids (see hex_to_binary in
+-- data_loader.py); query them with UNHEX('...') and display them with HEX().
+-- Lives in its own database so both variants can be benchmarked side by side.
+
+CREATE DATABASE IF NOT EXISTS ecommerce_db_binary;
+USE ecommerce_db_binary;
+
+-- Drop tables if they exist (for clean re-runs)
+DROP TABLE IF EXISTS order_reviews;
+DROP TABLE IF EXISTS order_payments;
+DROP TABLE IF EXISTS order_items;
+DROP TABLE IF EXISTS orders;
+DROP TABLE IF EXISTS products;
+DROP TABLE IF EXISTS product_category_name_translation;
+DROP TABLE IF EXISTS sellers;
+DROP TABLE IF EXISTS customers;
+DROP TABLE IF EXISTS geolocation;
+DROP TABLE IF EXISTS geolocation_centroids;
+
+-- Customers table
+CREATE TABLE customers (
+    customer_id BINARY(16) PRIMARY KEY,
+    customer_unique_id VARCHAR(32),
+    customer_zip_code_prefix INT,
+    customer_city VARCHAR(50),
+    customer_state VARCHAR(2)
+);
+
+-- Sellers table
+CREATE TABLE sellers (
+    seller_id BINARY(16) PRIMARY KEY,
+    seller_zip_code_prefix INT,
+    seller_city VARCHAR(50),
+    seller_state VARCHAR(2)
+);
+
+-- Product category name translation
+CREATE TABLE product_category_name_translation (
+    product_category_name VARCHAR(50) PRIMARY KEY,
+    product_category_name_english VARCHAR(50)
+);
+
+-- Products table
+CREATE TABLE products (
+    product_id BINARY(16) PRIMARY KEY,
+    product_category_name VARCHAR(50),
+    product_name_lenght INT,
+    product_description_lenght INT,
+    product_photos_qty INT,
+    product_weight_g INT,
+    product_length_cm INT,
+    product_height_cm INT,
+    product_width_cm INT,
+    FOREIGN KEY (product_category_name) REFERENCES product_category_name_translation(product_category_name)
+);
+
+-- Orders table
+CREATE TABLE orders (
+    order_id BINARY(16) PRIMARY KEY,
+    customer_id BINARY(16),
+    order_status VARCHAR(20),
+    order_purchase_timestamp DATETIME,
+    order_approved_at DATETIME,
+    order_delivered_carrier_date DATETIME,
+    order_delivered_customer_date DATETIME,
+    order_estimated_delivery_date DATETIME,
+    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+);
+
+-- Order items table
+CREATE TABLE order_items (
+    order_id BINARY(16),
+    order_item_id INT,
+    product_id BINARY(16),
+    seller_id BINARY(16),
+    shipping_limit_date DATETIME,
+    price DECIMAL(10,2),
+    freight_value DECIMAL(10,2),
+    PRIMARY KEY (order_id, order_item_id),
+    FOREIGN KEY (order_id) REFERENCES orders(order_id),
+    FOREIGN KEY (product_id) REFERENCES products(product_id),
+    FOREIGN KEY (seller_id) REFERENCES sellers(seller_id)
+);
+
+-- Order payments table
+CREATE TABLE order_payments (
+    order_id BINARY(16),
+    payment_sequential INT,
+    payment_type VARCHAR(20),
+    payment_installments INT,
+    payment_value DECIMAL(10,2),
+    PRIMARY KEY (order_id, payment_sequential),
+    FOREIGN KEY (order_id) REFERENCES orders(order_id)
+);
+
+-- Order reviews table
+CREATE TABLE order_reviews (
+    review_id BINARY(16) PRIMARY KEY,
+    order_id BINARY(16),
+    review_score INT,
+    review_comment_title VARCHAR(100),
+    review_comment_message TEXT,
+    review_creation_date DATETIME,
+    review_answer_timestamp DATETIME,
+    FOREIGN KEY (order_id) REFERENCES orders(order_id),
+    FULLTEXT(review_comment_title, review_comment_message)
+);
+
+-- Geolocation table
+CREATE TABLE geolocation (
+    geolocation_zip_code_prefix INT,
+    geolocation_lat DECIMAL(10,8),
+    geolocation_lng DECIMAL(11,8),
+    geolocation_city VARCHAR(50),
+    geolocation_state VARCHAR(2)
+);
+
+-- Geolocation centroids: one row per zip code prefix, collapsed from geolocation by the loader
+CREATE TABLE geolocation_centroids (
+    geolocation_zip_code_prefix INT PRIMARY KEY,
+    geolocation_lat DECIMAL(10,8),
+    geolocation_lng DECIMAL(11,8),
+    geolocation_city VARCHAR(50),
+    geolocation_state VARCHAR(2),
+    sample_count INT
+);
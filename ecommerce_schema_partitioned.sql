@@ -0,0 +1,109 @@
+-- Brazilian E-commerce Database Schema (partitioned variant)
+-- Assignment 5 - Database Indexing and Performance
+--
+-- orders and order_items range-partitioned by month of order_purchase_timestamp
+-- (one partition per month of the Olist data, 2016-09 .. 2018-12, plus
+-- p_future). order_items carries a copy of its order's purchase timestamp so
+-- both tables prune on the same date predicate and share partition boundaries.
+--
+-- MySQL requires the partitioning column in every unique key and does not
+-- support foreign keys on partitioned tables, so the primary keys include
+-- order_purchase_timestamp and there are no FOREIGN KEY clauses.
+-- Populated from ecommerce_db by DatabasePerformanceTester.create_partitioned_schema();
+-- new months are split off p_future by add_order_partition().
+
+CREATE DATABASE IF NOT EXISTS ecommerce_db_partitioned;
+USE ecommerce_db_partitioned;
+
+DROP TABLE IF EXISTS order_items;
+DROP TABLE IF EXISTS orders;
+
+-- Orders table, one partition per purchase month
+CREATE TABLE orders (
+    order_id VARCHAR(32) NOT NULL,
+    customer_id VARCHAR(32),
+    order_status VARCHAR(20),
+    order_purchase_timestamp DATETIME NOT NULL,
+    order_approved_at DATETIME,
+    order_delivered_carrier_date DATETIME,
+    order_delivered_customer_date DATETIME,
+    order_estimated_delivery_date DATETIME,
+    PRIMARY KEY (order_id, order_purchase_timestamp),
+    INDEX idx_orders_customer (customer_id)
+)
+PARTITION BY RANGE COLUMNS (order_purchase_timestamp) (
+    PARTITION p201609 VALUES LESS THAN ('2016-10-01'),
+    PARTITION p201610 VALUES LESS THAN ('2016-11-01'),
+    PARTITION p201611 VALUES LESS THAN ('2016-12-01'),
+    PARTITION p201612 VALUES LESS THAN ('2017-01-01'),
+    PARTITION p201701 VALUES LESS THAN ('2017-02-01'),
+    PARTITION p201702 VALUES LESS THAN ('2017-03-01'),
+    PARTITION p201703 VALUES LESS THAN ('2017-04-01'),
+    PARTITION p201704 VALUES LESS THAN ('2017-05-01'),
+    PARTITION p201705 VALUES LESS THAN ('2017-06-01'),
+    PARTITION p201706 VALUES LESS THAN ('2017-07-01'),
+    PARTITION p201707 VALUES LESS THAN ('2017-08-01'),
+    PARTITION p201708 VALUES LESS THAN ('2017-09-01'),
+    PARTITION p201709 VALUES LESS THAN ('2017-10-01'),
+    PARTITION p201710 VALUES LESS THAN ('2017-11-01'),
+    PARTITION p201711 VALUES LESS THAN ('2017-12-01'),
+    PARTITION p201712 VALUES LESS THAN ('2018-01-01'),
+    PARTITION p201801 VALUES LESS THAN ('2018-02-01'),
+    PARTITION p201802 VALUES LESS THAN ('2018-03-01'),
+    PARTITION p201803 VALUES LESS THAN ('2018-04-01'),
+    PARTITION p201804 VALUES LESS THAN ('2018-05-01'),
+    PARTITION p201805 VALUES LESS THAN ('2018-06-01'),
+    PARTITION p201806 VALUES LESS THAN ('2018-07-01'),
+    PARTITION p201807 VALUES LESS THAN ('2018-08-01'),
+    PARTITION p201808 VALUES LESS THAN ('2018-09-01'),
+    PARTITION p201809 VALUES LESS THAN ('2018-10-01'),
+    PARTITION p201810 VALUES LESS THAN ('2018-11-01'),
+    PARTITION p201811 VALUES LESS THAN ('2018-12-01'),
+    PARTITION p201812 VALUES LESS THAN ('2019-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- Order items table, partitioned like its orders
+CREATE TABLE order_items (
+    order_id VARCHAR(32) NOT NULL,
+    order_item_id INT NOT NULL,
+    product_id VARCHAR(32),
+    seller_id VARCHAR(32),
+    shipping_limit_date DATETIME,
+    price DECIMAL(10,2),
+    freight_value DECIMAL(10,2),
+    order_purchase_timestamp DATETIME NOT NULL,
+    PRIMARY KEY (order_id, order_item_id, order_purchase_timestamp),
+    INDEX idx_order_items_product (product_id)
+)
+PARTITION BY RANGE COLUMNS (order_purchase_timestamp) (
+    PARTITION p201609 VALUES LESS THAN ('2016-10-01'),
+    PARTITION p201610 VALUES LESS THAN ('2016-11-01'),
+    PARTITION p201611 VALUES LESS THAN ('2016-12-01'),
+    PARTITION p201612 VALUES LESS THAN ('2017-01-01'),
+    PARTITION p201701 VALUES LESS THAN ('2017-02-01'),
+    PARTITION p201702 VALUES LESS THAN ('2017-03-01'),
+    PARTITION p201703 VALUES LESS THAN ('2017-04-01'),
+    PARTITION p201704 VALUES LESS THAN ('2017-05-01'),
+    PARTITION p201705 VALUES LESS THAN ('2017-06-01'),
+    PARTITION p201706 VALUES LESS THAN ('2017-07-01'),
+    PARTITION p201707 VALUES LESS THAN ('2017-08-01'),
+    PARTITION p201708 VALUES LESS THAN ('2017-09-01'),
+    PARTITION p201709 VALUES LESS THAN ('2017-10-01'),
+    PARTITION p201710 VALUES LESS THAN ('2017-11-01'),
+    PARTITION p201711 VALUES LESS THAN ('2017-12-01'),
+    PARTITION p201712 VALUES LESS THAN ('2018-01-01'),
+    PARTITION p201801 VALUES LESS THAN ('2018-02-01'),
+    PARTITION p201802 VALUES LESS THAN ('2018-03-01'),
+    PARTITION p201803 VALUES LESS THAN ('2018-04-01'),
+    PARTITION p201804 VALUES LESS THAN ('2018-05-01'),
+    PARTITION p201805 VALUES LESS THAN ('2018-06-01'),
+    PARTITION p201806 VALUES LESS THAN ('2018-07-01'),
+    PARTITION p201807 VALUES LESS THAN ('2018-08-01'),
+    PARTITION p201808 VALUES LESS THAN ('2018-09-01'),
+    PARTITION p201809 VALUES LESS THAN ('2018-10-01'),
+    PARTITION p201810 VALUES LESS THAN ('2018-11-01'),
+    PARTITION p201811 VALUES LESS THAN ('2018-12-01'),
+    PARTITION p201812 VALUES LESS THAN ('2019-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
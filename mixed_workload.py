@@ -0,0 +1,258 @@
+"""
+Assignment 5 - Mixed OLTP Read/Write Workload
+PROG8850 - Database Automation
+
+Runs client threads that interleave the write transactions of
+write_workload.py with the scalar and full-text reads of the testers at a
+configurable read ratio, and reports throughput alongside the InnoDB lock
+waits, lock wait time and deadlocks seen in INNODB_METRICS, sys and
+performance_schema while the workload ran.
+"""
+
+import argparse
+import random
+import threading
+import time
+from typing import Dict, List, Sequence
+
+import mysql.connector
+
+from performance_tester import DatabasePerformanceTester, SCALAR_QUERIES, FULLTEXT_QUERIES
+from write_workload import WriteWorkload, load_reference_ids, summarize_latencies
+
+# Lock counters read from information_schema.INNODB_METRICS before and after a run
+LOCK_METRICS = ['lock_deadlocks', 'lock_timeouts', 'lock_row_lock_waits', 'lock_row_lock_time',
+                'lock_row_lock_time_max', 'lock_row_lock_current_waits']
+
+# Client errors counted as contention rather than failures
+DEADLOCK_ERRNO = 1213
+LOCK_WAIT_TIMEOUT_ERRNO = 1205
+
+def read_lock_metrics(cursor) -> Dict[str, int]:
+    """Current values of the InnoDB lock counters"""
+    placeholders = ', '.join(['%s'] * len(LOCK_METRICS))
+    cursor.execute(f"SELECT NAME, COUNT FROM information_schema.INNODB_METRICS WHERE NAME IN ({placeholders})",
+                   LOCK_METRICS)
+    return {name: count for name, count in cursor.fetchall()}
+
+class LockWaitSampler(threading.Thread):
+    """Samples sys.innodb_lock_waits on its own connection while the workload runs"""
+
+    def __init__(self, connection_settings: Dict[str, str], interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.connection_settings = connection_settings
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.samples = 0
+        self.max_concurrent_waits = 0
+        self.max_wait_age = 0.0
+        self.blocking_statements: Dict[str, int] = {}
+
+    def run(self):
+        """Poll until stop() is called"""
+        connection = mysql.connector.connect(**self.connection_settings, autocommit=True)
+        cursor = connection.cursor()
+        try:
+            while not self.stop_event.is_set():
+                cursor.execute("SELECT wait_age_secs, blocking_query FROM sys.innodb_lock_waits")
+                waits = cursor.fetchall()
+                self.samples += 1
+                self.max_concurrent_waits = max(self.max_concurrent_waits, len(waits))
+                for wait_age, blocking_query in waits:
+                    self.max_wait_age = max(self.max_wait_age, float(wait_age or 0))
+                    statement = (blocking_query or '(idle in transaction)')[:80]
+                    self.blocking_statements[statement] = self.blocking_statements.get(statement, 0) + 1
+                self.stop_event.wait(self.interval)
+        finally:
+            cursor.close()
+            connection.close()
+
+    def stop(self):
+        """Stop sampling and wait for the thread"""
+        self.stop_event.set()
+        self.join()
+
+class MixedWorkloadClient(threading.Thread):
+    """One client: its own connection, choosing a read or a write transaction each iteration"""
+
+    def __init__(self, connection_settings: Dict[str, str], reference_ids: Dict[str, List[str]],
+                 read_ratio: float, deadline: float, seed: int,
+                 created_orders: List[str], order_progress: Dict[str, int], shared_lock: threading.Lock,
+                 read_queries: Sequence[tuple]):
+        super().__init__(daemon=True)
+        self.connection_settings = connection_settings
+        self.reference_ids = reference_ids
+        self.read_ratio = read_ratio
+        self.deadline = deadline
+        self.random = random.Random(seed)
+        self.created_orders = created_orders
+        self.order_progress = order_progress
+        self.shared_lock = shared_lock
+        self.read_queries = read_queries
+        self.latencies: Dict[str, List[float]] = {'read': [], 'write': []}
+        self.deadlocks = 0
+        self.lock_timeouts = 0
+        self.errors = 0
+        self.unexpected_errors: Dict[str, int] = {}
+
+    def run(self):
+        """Issue transactions until the deadline"""
+        connection = mysql.connector.connect(**self.connection_settings, autocommit=True)
+        cursor = connection.cursor()
+        workload = WriteWorkload(connection, self.reference_ids, seed=self.random.randint(0, 2 ** 31),
+                                 created_orders=self.created_orders, order_progress=self.order_progress,
+                                 shared_lock=self.shared_lock)
+        try:
+            while time.perf_counter() < self.deadline:
+                try:
+                    if self.random.random() < self.read_ratio:
+                        query, _ = self.random.choice(self.read_queries)
+                        start_time = time.perf_counter()
+                        cursor.execute(query)
+                        cursor.fetchall()
+                        self.latencies['read'].append(time.perf_counter() - start_time)
+                    else:
+                        self.latencies['write'].append(getattr(workload, workload.next_transaction())())
+                except mysql.connector.Error as err:
+                    if err.errno == DEADLOCK_ERRNO:
+                        self.deadlocks += 1
+                    elif err.errno == LOCK_WAIT_TIMEOUT_ERRNO:
+                        self.lock_timeouts += 1
+                    else:
+                        self.errors += 1
+                except Exception as err:
+                    # Counted rather than ending the thread, which would skew throughput and latency
+                    name = type(err).__name__
+                    self.unexpected_errors[name] = self.unexpected_errors.get(name, 0) + 1
+        finally:
+            cursor.close()
+            connection.close()
+
+def run_mixed_workload(tester: DatabasePerformanceTester, threads: int = 4, read_ratio: float = 0.8,
+                       duration: float = 30.0, include_fulltext: bool = True,
+                       sample_interval: float = 0.5) -> Dict[str, float]:
+    """Run the mixed workload with a number of client threads and report throughput and lock contention
+
+    read_ratio is the share of iterations that run a read query (scalar and,
+    with include_fulltext, full-text searches); the rest run the write mix
+    from write_workload.py. Generated orders are deleted afterwards.
+    """
+    print(f"🔀 Mixed workload: {threads} threads, {read_ratio * 100:.0f}% reads, {duration:.0f}s")
+
+    connection_settings = {'host': tester.host, 'user': tester.user, 'password': tester.password,
+                           'database': tester.database}
+    reference_ids = load_reference_ids(tester.cursor)
+    if not all(reference_ids.values()):
+        print("❌ customers, products and sellers must be loaded before running the mixed workload")
+        return {}
+    read_queries = list(SCALAR_QUERIES) + (list(FULLTEXT_QUERIES) if include_fulltext else [])
+
+    metrics_before = read_lock_metrics(tester.cursor)
+    sampler = LockWaitSampler(connection_settings, sample_interval)
+    sampler.start()
+
+    created_orders: List[str] = []
+    order_progress: Dict[str, int] = {}
+    shared_lock = threading.Lock()
+    start_time = time.perf_counter()
+    clients = [MixedWorkloadClient(connection_settings, reference_ids, read_ratio, start_time + duration,
+                                   seed=thread_number, created_orders=created_orders,
+                                   order_progress=order_progress, shared_lock=shared_lock,
+                                   read_queries=read_queries)
+               for thread_number in range(threads)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start_time
+
+    sampler.stop()
+    metrics_after = read_lock_metrics(tester.cursor)
+
+    cleanup = WriteWorkload(tester.connection, reference_ids, created_orders=created_orders,
+                            order_progress=order_progress, shared_lock=shared_lock)
+    cleanup.cleanup()
+    tester._bump_table_versions('orders', 'order_items', 'order_payments', 'order_reviews')
+
+    latencies = {'read': [], 'write': []}
+    for client in clients:
+        for kind, values in client.latencies.items():
+            latencies[kind].extend(values)
+    summary = summarize_latencies(latencies, elapsed)
+
+    results = {
+        'threads': threads,
+        'read_ratio': read_ratio,
+        'reads_per_sec': summary.get('read', {}).get('tps', 0.0),
+        'writes_per_sec': summary.get('write', {}).get('tps', 0.0),
+        'read_p95_ms': summary.get('read', {}).get('p95_ms', 0.0),
+        'write_p95_ms': summary.get('write', {}).get('p95_ms', 0.0),
+        'client_deadlocks': sum(client.deadlocks for client in clients),
+        'client_lock_timeouts': sum(client.lock_timeouts for client in clients),
+        'client_errors': sum(client.errors for client in clients),
+        'client_unexpected_errors': sum(sum(client.unexpected_errors.values()) for client in clients),
+        'max_concurrent_lock_waits': sampler.max_concurrent_waits,
+        'max_lock_wait_age_secs': sampler.max_wait_age,
+    }
+    for name in LOCK_METRICS:
+        if name in ('lock_row_lock_time_max', 'lock_row_lock_current_waits'):
+            results[name] = metrics_after.get(name, 0)
+        else:
+            results[name] = metrics_after.get(name, 0) - metrics_before.get(name, 0)
+
+    print(f"   Reads: {results['reads_per_sec']:.1f}/s (p95 {results['read_p95_ms']:.2f}ms), "
+          f"Writes: {results['writes_per_sec']:.1f} tx/s (p95 {results['write_p95_ms']:.2f}ms)")
+    print(f"   Row lock waits: {results['lock_row_lock_waits']}, row lock time: {results['lock_row_lock_time']}ms "
+          f"(max {results['lock_row_lock_time_max']}ms), deadlocks: {results['lock_deadlocks']}, "
+          f"lock wait timeouts: {results['lock_timeouts']}")
+    print(f"   Peak concurrent lock waits: {results['max_concurrent_lock_waits']} "
+          f"(longest {results['max_lock_wait_age_secs']:.2f}s over {sampler.samples} samples)")
+    for statement, count in sorted(sampler.blocking_statements.items(), key=lambda item: -item[1])[:3]:
+        print(f"   Blocking: {statement} ({count} samples)")
+    if results['client_errors']:
+        print(f"⚠️  {results['client_errors']} transactions failed with non-lock errors")
+    if results['client_unexpected_errors']:
+        unexpected: Dict[str, int] = {}
+        for client in clients:
+            for name, count in client.unexpected_errors.items():
+                unexpected[name] = unexpected.get(name, 0) + count
+        print(f"⚠️  {results['client_unexpected_errors']} iterations raised unexpected exceptions: "
+              f"{', '.join(f'{name} x{count}' for name, count in unexpected.items())}")
+    print()
+    return results
+
+def run_concurrency_sweep(tester: DatabasePerformanceTester, thread_counts: Sequence[int] = (1, 2, 4, 8),
+                          read_ratio: float = 0.8, duration: float = 30.0) -> List[Dict[str, float]]:
+    """Run the mixed workload at several concurrency levels and print a summary table"""
+    print("🔀 Running Mixed OLTP Workload")
+    print("=" * 50)
+
+    results = [run_mixed_workload(tester, threads, read_ratio, duration) for threads in thread_counts]
+    results = [result for result in results if result]
+
+    print("📈 MIXED WORKLOAD SUMMARY")
+    print("=" * 40)
+    for result in results:
+        print(f"  {result['threads']} threads: {result['reads_per_sec']:.1f} reads/s, "
+              f"{result['writes_per_sec']:.1f} tx/s, {result['lock_row_lock_waits']} lock waits, "
+              f"{result['lock_deadlocks']} deadlocks")
+    return results
+
+def main():
+    """Run the mixed workload against the Docker MySQL database"""
+    parser = argparse.ArgumentParser(description="Mixed OLTP read/write workload with lock-contention reporting")
+    parser.add_argument('--threads', default='1,2,4,8', help="Comma-separated client thread counts")
+    parser.add_argument('--read-ratio', type=float, default=0.8, help="Share of iterations that run a read query")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds per thread count")
+    args = parser.parse_args()
+
+    tester = DatabasePerformanceTester()
+    try:
+        tester.connect()
+        run_concurrency_sweep(tester, [int(count) for count in args.threads.split(',')],
+                              args.read_ratio, args.duration)
+    finally:
+        tester.disconnect()
+
+if __name__ == "__main__":
+    main()
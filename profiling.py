@@ -0,0 +1,182 @@
+"""
+Assignment 5 - Stage Profiling
+PROG8850 - Database Automation
+
+Opt-in instrumentation for the loader and the test harness. StageProfiler
+times named stages (connect, parse, load_chunk, convert, insert,
+index_build, query, fetch) in wall-clock and CPU time, can attach a cProfile profiler and
+tracemalloc allocation diffs to each stage, and samples the profiled
+thread's stack into a flamegraph-compatible collapsed-stack file.
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval, prefixed by its innermost active stage"""
+
+    def __init__(self, profiler: 'StageProfiler', thread_id: int, interval: float):
+        super().__init__(daemon=True)
+        self.profiler = profiler
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.stacks: Dict[str, int] = {}
+
+    def run(self):
+        """Record collapsed stacks until stop() is called"""
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            active_stages = list(self.profiler.active_stages)
+            stage = f"stage:{active_stages[-1]}" if active_stages else 'stage:(none)'
+            stack = ';'.join([stage] + frames[::-1])
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def stop(self):
+        """Stop sampling and wait for the thread"""
+        self.stop_event.set()
+        self.join()
+
+class StageProfiler:
+    """Per-stage wall/CPU timers with optional cProfile, tracemalloc and stack sampling
+
+    Stages may nest; with use_cprofile each stage's profiler only runs while
+    it is the innermost stage, so functions are attributed to one stage.
+    With trace_memory the net and peak traced allocation of every call is
+    recorded, and the first snapshot_calls calls of each stage keep the top
+    allocation sites of a tracemalloc snapshot diff.
+    """
+
+    def __init__(self, use_cprofile: bool = False, trace_memory: bool = False,
+                 sample_interval: Optional[float] = 0.005, snapshot_calls: int = 1):
+        self.use_cprofile = use_cprofile
+        self.trace_memory = trace_memory
+        self.sample_interval = sample_interval
+        self.snapshot_calls = snapshot_calls
+        self.stages: Dict[str, Dict] = {}
+        self.active_stages: List[str] = []
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.sampler: Optional[StackSampler] = None
+
+    def start(self):
+        """Start tracemalloc and the stack sampler for the calling thread"""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.sample_interval:
+            self.sampler = StackSampler(self, threading.get_ident(), self.sample_interval)
+            self.sampler.start()
+
+    def stop(self):
+        """Stop the stack sampler and tracemalloc"""
+        if self.sampler is not None:
+            self.sampler.stop()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as one call of the named stage"""
+        stats = self.stages.setdefault(name, {'calls': 0, 'wall': 0.0, 'outermost_wall': 0.0, 'cpu': 0.0,
+                                              'net_bytes': 0, 'peak_bytes': 0, 'top_allocations': []})
+        parent = self.active_stages[-1] if self.active_stages else None
+        if self.use_cprofile:
+            if parent is not None:
+                self.profiles[parent].disable()
+            self.profiles.setdefault(name, cProfile.Profile()).enable()
+        snapshot = None
+        if self.trace_memory:
+            if stats['calls'] < self.snapshot_calls:
+                snapshot = tracemalloc.take_snapshot()
+            memory_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.active_stages.append(name)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - wall_start
+            stats['wall'] += elapsed
+            if parent is None:
+                stats['outermost_wall'] += elapsed
+            stats['cpu'] += time.process_time() - cpu_start
+            stats['calls'] += 1
+            self.active_stages.pop()
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                stats['net_bytes'] += current - memory_start
+                stats['peak_bytes'] = max(stats['peak_bytes'], peak - memory_start)
+                if snapshot is not None:
+                    differences = self._filter_snapshot(tracemalloc.take_snapshot()).compare_to(
+                        self._filter_snapshot(snapshot), 'lineno')
+                    stats['top_allocations'].append([str(difference) for difference in differences[:5]])
+            if self.use_cprofile:
+                self.profiles[name].disable()
+                if parent is not None:
+                    self.profiles[parent].enable()
+
+    @staticmethod
+    def _filter_snapshot(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+        """Drop the allocations of tracemalloc and of the profiler itself"""
+        return snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                       tracemalloc.Filter(False, __file__)])
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Print and return the per-stage breakdown, slowest stage first"""
+        print("\n⏱️  STAGE PROFILE")
+        print("=" * 40)
+        # Nested stages are shown as a share of the time spent in outermost stages
+        total_wall = sum(stats['outermost_wall'] for stats in self.stages.values()) or 1.0
+        results = {}
+        for name, stats in sorted(self.stages.items(), key=lambda item: -item[1]['wall']):
+            results[name] = {key: stats[key] for key in ('calls', 'wall', 'cpu', 'net_bytes', 'peak_bytes')}
+            print(f"  {name}: {stats['wall']:.4f}s wall ({stats['wall'] / total_wall * 100:.1f}%), "
+                  f"{stats['cpu']:.4f}s CPU, {stats['calls']} calls")
+            if self.trace_memory:
+                print(f"    Memory: net {stats['net_bytes'] / 1024 / 1024:+.2f} MB, "
+                      f"peak {stats['peak_bytes'] / 1024 / 1024:.2f} MB")
+                for line in (stats['top_allocations'][0] if stats['top_allocations'] else [])[:3]:
+                    print(f"      {line}")
+        return results
+
+    def write_collapsed_stacks(self, path: str) -> int:
+        """Write sampled stacks as "frame;frame;... count" lines (flamegraph.pl / speedscope input)"""
+        stacks = self.sampler.stacks if self.sampler is not None else {}
+        with open(path, 'w') as file:
+            for stack, count in sorted(stacks.items()):
+                file.write(f"{stack} {count}\n")
+        return len(stacks)
+
+    def write_cprofile_stats(self, directory: str) -> List[str]:
+        """Dump each stage's cProfile statistics to <directory>/<stage>.prof"""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name, profile in self.profiles.items():
+            path = os.path.join(directory, f"{name}.prof")
+            pstats.Stats(profile).dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def write_outputs(self, directory: str):
+        """Report the stages and write the collapsed stacks and cProfile dumps under directory"""
+        self.report()
+        os.makedirs(directory, exist_ok=True)
+        if self.sampler is not None:
+            path = os.path.join(directory, 'stacks.collapsed')
+            print(f"🔥 {self.write_collapsed_stacks(path)} distinct sampled stacks written to {path}")
+        if self.profiles:
+            paths = self.write_cprofile_stats(directory)
+            print(f"📄 cProfile statistics written to {', '.join(paths)}")
@@ -0,0 +1,280 @@
+"""
+Assignment 5 - Client-side Query Result Cache
+PROG8850 - Database Automation
+
+An LRU, size-bounded cache of SELECT results keyed on the current database,
+normalised SQL and parameters. Every entry remembers the version of each
+schema.table it read; the loader, the write paths and DDL bump those
+versions, so a cached result is never served after one of its tables has
+changed.
+"""
+
+import re
+import sys
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+IDENTIFIER = r'(?:`[^`]+`|\w+)'
+# [schema.]table, capturing the schema and table parts
+QUALIFIED_NAME_PATTERN = re.compile(rf'(?:({IDENTIFIER})\s*\.\s*)?({IDENTIFIER})')
+# Keywords followed by table names: a join operand, the target of INSERT/REPLACE INTO, the names of
+# ALTER/CREATE/TRUNCATE/DROP/ANALYZE TABLE (where a following parenthesis is a column list), and the
+# table of CREATE/DROP INDEX ... ON
+JOIN_PATTERN = re.compile(r'\bJOIN\s+', re.I)
+TARGET_TABLE_PATTERN = re.compile(r'\b(INTO|TABLE)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?', re.I)
+INDEX_TARGET_PATTERN = re.compile(rf'^(?:CREATE\s+(?:UNIQUE\s+|FULLTEXT\s+|SPATIAL\s+)?|DROP\s+)INDEX\s+'
+                                  rf'{IDENTIFIER}\s+ON\s+', re.I)
+# Keywords followed by a comma-separated list of table references (not SELECT ... FOR UPDATE / ON DUPLICATE KEY UPDATE)
+TABLE_LIST_PATTERN = re.compile(r'\bFROM\s+|(?<!FOR )(?<!KEY )\bUPDATE\s+(?!HISTOGRAM\b)', re.I)
+# Clauses that end a FROM/UPDATE table list, and the tokens the list is scanned in
+TABLE_LIST_END_KEYWORDS = {'WHERE', 'GROUP', 'HAVING', 'ORDER', 'LIMIT', 'WINDOW', 'UNION', 'EXCEPT',
+                           'INTERSECT', 'FOR', 'LOCK', 'INTO', 'SET', 'PROCEDURE'}
+LIST_TOKEN_PATTERN = re.compile(r'`[^`]*`|\w+|[(),]')
+SUBQUERY_START_PATTERN = re.compile(r'\s*\(*\s*(?:SELECT|WITH|VALUES|TABLE)\b', re.I)
+STRING_LITERAL_PATTERN = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+COMMENT_PATTERN = re.compile(r'/\*.*?\*/|(?:-- |#)[^\n]*', re.S)
+
+def normalize_sql(query: str) -> str:
+    """Collapse whitespace outside string literals and drop a trailing semicolon"""
+    parts = re.split(r"('(?:[^'\\]|\\.|'')*')", query.strip().rstrip(';'))
+    return ''.join(part if i % 2 else re.sub(r'\s+', ' ', part) for i, part in enumerate(parts)).strip()
+
+def _closing_parenthesis(text: str, start: int) -> int:
+    """Index of the parenthesis closing the one at start, or -1 if unbalanced"""
+    depth = 0
+    for position in range(start, len(text)):
+        if text[position] == '(':
+            depth += 1
+        elif text[position] == ')':
+            depth -= 1
+            if depth == 0:
+                return position
+    return -1
+
+def _table_name(match: re.Match, default_schema: Optional[str]) -> str:
+    """Lower-cased table name of a QUALIFIED_NAME_PATTERN match, as schema.table given a default schema"""
+    schema, table = (part.strip('`').lower() if part else None for part in match.groups())
+    if default_schema is None:
+        return table
+    return f"{schema or default_schema.lower()}.{table}"
+
+def _table_factor(text: str, default_schema: Optional[str] = None) -> Optional[List[str]]:
+    """Tables named by the table reference at the start of text, or None if it cannot be parsed
+
+    Subqueries contribute nothing here (their own FROM clauses are found
+    separately); a parenthesised join is parsed as a table list.
+    """
+    text = re.sub(r'^\s*LATERAL\b', '', text, flags=re.I).lstrip()
+    if text.startswith('('):
+        end = _closing_parenthesis(text, 0)
+        if end < 0:
+            return None
+        inner = text[1:end]
+        return [] if SUBQUERY_START_PATTERN.match(inner) else _table_list(inner, default_schema)
+    match = QUALIFIED_NAME_PATTERN.match(text)
+    if match is None or text[match.end():].lstrip().startswith('('):
+        # Not a name, or a table function such as JSON_TABLE(...)
+        return None
+    if match.group(1) is None and match.group(2).strip('`').lower() == 'dual':
+        return []
+    return [_table_name(match, default_schema)]
+
+def _table_list(text: str, default_schema: Optional[str] = None) -> Optional[List[str]]:
+    """Tables of a comma-separated FROM/UPDATE list at the start of text, up to the clause that ends it"""
+    tables = []
+    depth = 0
+    piece_start = 0
+    end = len(text)
+    for token in LIST_TOKEN_PATTERN.finditer(text):
+        value = token.group()
+        if value == '(':
+            depth += 1
+        elif value == ')':
+            depth -= 1
+            if depth < 0:
+                end = token.start()
+                break
+        elif depth == 0 and value == ',':
+            factor = _table_factor(text[piece_start:token.start()], default_schema)
+            if factor is None:
+                return None
+            tables.extend(factor)
+            piece_start = token.end()
+        elif depth == 0 and value.upper() in TABLE_LIST_END_KEYWORDS:
+            end = token.start()
+            break
+    factor = _table_factor(text[piece_start:end], default_schema)
+    if factor is None:
+        return None
+    return tables + factor
+
+def referenced_tables(query: str, default_schema: Optional[str] = None) -> Optional[List[str]]:
+    """Table names a statement reads or writes, or None if a table reference cannot be parsed
+
+    Covers comma-separated FROM and UPDATE lists, JOINs, INTO and TABLE
+    targets and CREATE/DROP INDEX ... ON. Without default_schema names are
+    reduced to the table name; with it every name is returned as
+    schema.table, unqualified ones in default_schema.
+    """
+    text = COMMENT_PATTERN.sub(' ', STRING_LITERAL_PATTERN.sub("''", query))
+    text = re.sub(r'\s+', ' ', text).strip()
+    if re.match(r'CALL\b', text, re.I):
+        # A stored procedure may read or write any table
+        return None
+    tables = set()
+    for match in TABLE_LIST_PATTERN.finditer(text):
+        listed = _table_list(text[match.end():], default_schema)
+        if listed is None:
+            return None
+        tables.update(listed)
+    for match in JOIN_PATTERN.finditer(text):
+        factor = _table_factor(text[match.end():], default_schema)
+        if factor is None:
+            return None
+        tables.update(factor)
+    for match in TARGET_TABLE_PATTERN.finditer(text):
+        rest = text[match.end():]
+        if rest.startswith('@') or re.match(r'(?:OUTFILE|DUMPFILE)\b', rest, re.I):
+            # SELECT ... INTO @variable / OUTFILE writes no table
+            continue
+        target = QUALIFIED_NAME_PATTERN.match(rest)
+        if target is None:
+            return None
+        tables.add(_table_name(target, default_schema))
+        # DROP/TRUNCATE/ANALYZE TABLE take a list of names
+        while match.group(1).upper() == 'TABLE':
+            separator = re.match(r'\s*,\s*', rest[target.end():])
+            if separator is None:
+                break
+            rest = rest[target.end() + separator.end():]
+            target = QUALIFIED_NAME_PATTERN.match(rest)
+            if target is None:
+                return None
+            tables.add(_table_name(target, default_schema))
+    index_target = INDEX_TARGET_PATTERN.match(text)
+    if index_target is not None:
+        target = QUALIFIED_NAME_PATTERN.match(text[index_target.end():])
+        if target is None:
+            return None
+        tables.add(_table_name(target, default_schema))
+    return sorted(tables)
+
+def _estimate_size(rows: Sequence[tuple]) -> int:
+    """Rough in-memory size of a result set in bytes"""
+    return sys.getsizeof(rows) + sum(sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+                                     for row in rows)
+
+class TableVersions:
+    """Per-table version counters; bump() on every write to a table"""
+
+    def __init__(self):
+        self.versions: Dict[str, int] = {}
+
+    def bump(self, *tables: str):
+        """Mark tables as changed"""
+        for table in tables:
+            table = table.lower()
+            self.versions[table] = self.versions.get(table, 0) + 1
+
+    def snapshot(self, tables: Iterable[str]) -> Tuple[Tuple[str, int], ...]:
+        """Current versions of the given tables"""
+        return tuple((table, self.versions.get(table, 0)) for table in tables)
+
+class QueryResultCache:
+    """LRU cache of query results bounded by entry count and estimated bytes"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024,
+                 table_versions: Optional[TableVersions] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.table_versions = table_versions or TableVersions()
+        self.entries: 'OrderedDict[tuple, dict]' = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.uncacheable = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def make_key(query: str, params: Optional[Sequence] = None, database: Optional[str] = None) -> tuple:
+        """Cache key: the current database, normalised SQL and the parameter values"""
+        return database, normalize_sql(query), tuple(params or ())
+
+    def get(self, query: str, params: Optional[Sequence] = None,
+            database: Optional[str] = None) -> Optional[List[tuple]]:
+        """Cached rows for a query run in database, or None on a miss or when a table it read has changed"""
+        key = self.make_key(query, params, database)
+        entry = self.entries.get(key)
+        if entry is not None and entry['versions'] != self.table_versions.snapshot(t for t, _ in entry['versions']):
+            self._remove(key)
+            self.invalidations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        self.saved_seconds += entry['cost']
+        return entry['rows']
+
+    def put(self, query: str, params: Optional[Sequence], rows: List[tuple], cost: float,
+            database: Optional[str] = None):
+        """Store a result together with the versions of the tables it read and its execution time
+
+        With database the versions are those of schema.table, unqualified
+        names resolved in database. Results of statements whose tables cannot
+        be determined are not stored, since nothing could invalidate them.
+        """
+        tables = referenced_tables(query, database)
+        if tables is None:
+            self.uncacheable += 1
+            return
+        key = self.make_key(query, params, database)
+        size = _estimate_size(rows)
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self._remove(key)
+
+        self.entries[key] = {
+            'rows': rows,
+            'size': size,
+            'cost': cost,
+            'versions': self.table_versions.snapshot(tables),
+        }
+        self.current_bytes += size
+        while len(self.entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, key: tuple):
+        """Drop one entry"""
+        self.current_bytes -= self.entries.pop(key)['size']
+
+    def clear(self):
+        """Drop every entry (statistics are kept)"""
+        self.entries.clear()
+        self.current_bytes = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters, size and the query time saved by hits"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'uncacheable': self.uncacheable,
+            'entries': len(self.entries),
+            'bytes': self.current_bytes,
+            'saved_seconds': self.saved_seconds,
+        }
@@ -0,0 +1,317 @@
+"""
+Assignment 5 - Query Fingerprints and Workload Capture
+PROG8850 - Database Automation
+
+Normalises SQL into fingerprints (literals replaced by ?, IN/VALUES lists
+collapsed, whitespace and case folded) and reads captured workloads from the
+MySQL slow query log, the general query log or
+performance_schema.events_statements_summary_by_digest into a common list
+of statement events for workload_replay.py.
+"""
+
+import hashlib
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+COMMENT_PATTERN = re.compile(r'/\*.*?\*/|(?:-- |#)[^\n]*', re.S)
+STRING_LITERAL_PATTERN = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+NUMBER_LITERAL_PATTERN = re.compile(r'\b(?:0x[0-9a-f]+|\d+(?:\.\d*)?(?:e[+-]?\d+)?)\b', re.I)
+VALUE_LIST_PATTERN = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*')
+
+# File headers the server writes on every (re)start of the slow and general logs
+LOG_HEADER_PATTERN = re.compile(r'^(?:\S*mysqld\S*, Version:|Tcp port:|Time\s+Id\s+Command)')
+
+def fingerprint(query: str) -> str:
+    """Normalised form of a statement shared by every execution with different literals"""
+    normalized = STRING_LITERAL_PATTERN.sub('?', query)
+    normalized = COMMENT_PATTERN.sub(' ', normalized)
+    normalized = NUMBER_LITERAL_PATTERN.sub('?', normalized)
+    normalized = VALUE_LIST_PATTERN.sub('(?+)', normalized)
+    return re.sub(r'\s+', ' ', normalized).strip().rstrip(';').strip().lower()
+
+def query_digest(query: str) -> str:
+    """Short stable hash of a statement's fingerprint"""
+    return hashlib.md5(fingerprint(query).encode('utf-8')).hexdigest()[:16]
+
+def _parse_log_time(value: str) -> Optional[float]:
+    """Epoch seconds of a log timestamp (ISO 8601 as in MySQL 8, or the older YYMMDD HH:MM:SS)"""
+    value = value.strip()
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(value, '%y%m%d %H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+def parse_slow_log(path: str) -> List[Dict]:
+    """Statement events of a slow query log, in log order
+
+    Each event has the statement's start time (Start with log_slow_extra=ON,
+    else the # Time of the entry minus its Query_time, or SET timestamp), the
+    connection id, the duration and the rows sent/examined.
+    """
+    events = []
+    header: Dict = {}
+    statement_lines: List[str] = []
+
+    def flush():
+        query = ''.join(statement_lines).strip().rstrip(';')
+        statement_lines.clear()
+        if not query or header.get('thread_id') is None:
+            return
+        duration = header.get('Query_time', 0.0)
+        if header.get('start') is not None:
+            timestamp = header['start']
+        elif header.get('time') is not None:
+            timestamp = header['time'] - duration
+        else:
+            timestamp = header.get('set_timestamp', 0.0)
+        events.append({
+            'timestamp': timestamp,
+            'thread_id': header['thread_id'],
+            'query': query,
+            'duration': duration,
+            'rows_sent': int(header.get('Rows_sent', 0)),
+            'rows_examined': int(header.get('Rows_examined', 0)),
+        })
+
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        for line in file:
+            if line.startswith('# Time:'):
+                flush()
+                header = {'time': _parse_log_time(line[len('# Time:'):])}
+            elif line.startswith('# User@Host:'):
+                if statement_lines:
+                    # Entries logged in the same second as the previous one carry no # Time line
+                    flush()
+                    header = {'time': header.get('time')}
+                match = re.search(r'Id:\s*(\d+)', line)
+                header['thread_id'] = int(match.group(1)) if match else 0
+            elif line.startswith('# Query_time:'):
+                # log_slow_extra adds non-numeric fields such as Start/End timestamps
+                for key, value in re.findall(r'(\w+): (\S+)', line[1:]):
+                    if key == 'Start':
+                        header['start'] = _parse_log_time(value)
+                        continue
+                    try:
+                        header[key] = float(value)
+                    except ValueError:
+                        continue
+            elif line.startswith('#') or LOG_HEADER_PATTERN.match(line):
+                continue
+            elif re.match(r'SET timestamp=\d+;\s*$', line):
+                header['set_timestamp'] = float(re.search(r'\d+', line).group())
+            elif re.match(r'use \S+;\s*$', line, re.I):
+                continue
+            elif header:
+                statement_lines.append(line)
+        flush()
+    return events
+
+def parse_general_log(path: str) -> List[Dict]:
+    """Query and Execute events of a general query log, in log order
+
+    The general log records when each statement arrived but not how long it
+    ran, so duration and row counts are None.
+    """
+    events = []
+    current = None
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        for line in file:
+            parts = line.rstrip('\n').split('\t', 2)
+            timestamp = _parse_log_time(parts[0]) if len(parts) == 3 and parts[0] else None
+            if timestamp is None:
+                # Continuation of a multi-line statement
+                if current is not None and not LOG_HEADER_PATTERN.match(line):
+                    current['query'] += '\n' + line.rstrip('\n')
+                continue
+
+            current = None
+            thread_and_command = parts[1].split(None, 1)
+            if len(thread_and_command) == 2 and thread_and_command[1].strip() in ('Query', 'Execute'):
+                current = {
+                    'timestamp': timestamp,
+                    'thread_id': int(thread_and_command[0]),
+                    'query': parts[2],
+                    'duration': None,
+                    'rows_sent': None,
+                    'rows_examined': None,
+                }
+                events.append(current)
+    return events
+
+def read_digest_summary(cursor, schema_name: str, limit: int = 200) -> List[Dict]:
+    """Top statement digests of a schema from events_statements_summary_by_digest, by total time"""
+    cursor.execute(
+        "SELECT DIGEST, QUERY_SAMPLE_TEXT, COUNT_STAR, SUM_TIMER_WAIT, MAX_TIMER_WAIT, "
+        "SUM_ROWS_EXAMINED, SUM_ROWS_SENT, UNIX_TIMESTAMP(FIRST_SEEN), UNIX_TIMESTAMP(LAST_SEEN) "
+        "FROM performance_schema.events_statements_summary_by_digest "
+        "WHERE SCHEMA_NAME = %s AND QUERY_SAMPLE_TEXT IS NOT NULL AND QUERY_SAMPLE_TEXT <> '' "
+        "ORDER BY SUM_TIMER_WAIT DESC LIMIT %s",
+        (schema_name, int(limit)),
+    )
+    summaries = []
+    for (server_digest, sample, count, total_wait, max_wait, rows_examined, rows_sent,
+         first_seen, last_seen) in cursor.fetchall():
+        # Timer columns are in picoseconds
+        summaries.append({
+            'digest': query_digest(sample),
+            'server_digest': server_digest,
+            'fingerprint': fingerprint(sample),
+            'sample': sample,
+            'count': int(count),
+            'total_time': total_wait / 1e12,
+            'mean_time': total_wait / 1e12 / count if count else 0.0,
+            'max_time': max_wait / 1e12,
+            'rows_examined': int(rows_examined),
+            'rows_sent': int(rows_sent),
+            'first_seen': float(first_seen),
+            'last_seen': float(last_seen),
+        })
+    return summaries
+
+def events_from_digest_summary(summaries: List[Dict], threads: int = 4, max_events: int = 10000) -> List[Dict]:
+    """Synthesise a replayable event list from digest summaries
+
+    The digest table keeps counts and first/last-seen times but no individual
+    executions, so each digest's sample query is spread evenly between its
+    first and last sighting and dealt round-robin to threads connections.
+    Counts are scaled down proportionally when they exceed max_events.
+    """
+    total_count = sum(summary['count'] for summary in summaries)
+    scale = min(1.0, max_events / total_count) if total_count else 0.0
+
+    events = []
+    for summary in summaries:
+        count = max(1, int(round(summary['count'] * scale)))
+        timestamps = np.linspace(summary['first_seen'], summary['last_seen'], count)
+        for timestamp in timestamps:
+            events.append({
+                'timestamp': float(timestamp),
+                'thread_id': 0,
+                'query': summary['sample'],
+                'duration': summary['mean_time'],
+                'rows_sent': None,
+                'rows_examined': None,
+            })
+    events.sort(key=lambda event: event['timestamp'])
+    for position, event in enumerate(events):
+        event['thread_id'] = position % threads
+    return events
+
+def summarize_events(events: List[Dict]) -> Dict[str, Dict]:
+    """Per-digest frequency, latency and row statistics of a captured workload"""
+    grouped: Dict[str, List[Dict]] = {}
+    for event in events:
+        grouped.setdefault(query_digest(event['query']), []).append(event)
+
+    summaries = {}
+    for digest, digest_events in grouped.items():
+        durations = np.array([event['duration'] for event in digest_events if event['duration'] is not None])
+        summaries[digest] = {
+            'fingerprint': fingerprint(digest_events[0]['query']),
+            'sample': digest_events[0]['query'],
+            'count': len(digest_events),
+            'total_time': float(durations.sum()) if durations.size else 0.0,
+            'mean_time': float(durations.mean()) if durations.size else 0.0,
+            'p95_time': float(np.percentile(durations, 95)) if durations.size else 0.0,
+            'max_time': float(durations.max()) if durations.size else 0.0,
+            'rows_examined': sum(event['rows_examined'] or 0 for event in digest_events),
+            'rows_sent': sum(event['rows_sent'] or 0 for event in digest_events),
+        }
+    return dict(sorted(summaries.items(), key=lambda item: (-item[1]['total_time'], -item[1]['count'])))
+
+# Upper bounds (ms) of the latency histogram buckets kept per digest; slower runs go to a final overflow bucket
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Columns DigestStatistics.report() can sort by (descending)
+DIGEST_SORT_KEYS = ('total_time', 'count', 'mean_time', 'p95_time', 'max_time', 'rows_examined',
+                    'examined_per_returned', 'plans', 'cache_hits')
+
+class DigestStatistics:
+    """Latency histograms, rows examined vs returned and plan hashes per digest over a session"""
+
+    def __init__(self):
+        self.digests: Dict[str, Dict] = {}
+
+    def _entry(self, query: str) -> Dict:
+        """Statistics of a query's digest, created on first sight"""
+        digest = query_digest(query)
+        if digest not in self.digests:
+            self.digests[digest] = {
+                'fingerprint': fingerprint(query),
+                'sample': query,
+                'descriptions': [],
+                'latencies': [],
+                'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                'rows_returned': 0,
+                'rows_examined': 0,
+                'examined_rows_returned': 0,
+                'plan_hashes': {},
+                'cache_hits': 0,
+            }
+        return self.digests[digest]
+
+    def record(self, query: str, elapsed: float, rows_returned: int, rows_examined: Optional[int] = None,
+               description: Optional[str] = None, from_cache: bool = False):
+        """Add one execution; rows_examined is None when the server did not report it
+
+        Results served from a client-side cache are only counted as cache
+        hits, so latencies and rows examined describe server executions.
+        """
+        entry = self._entry(query)
+        if description and description not in entry['descriptions']:
+            entry['descriptions'].append(description)
+        if from_cache:
+            entry['cache_hits'] += 1
+            return
+        entry['latencies'].append(elapsed)
+        bucket = int(np.searchsorted(LATENCY_BUCKETS_MS, elapsed * 1000))
+        entry['buckets'][bucket] += 1
+        entry['rows_returned'] += rows_returned
+        if rows_examined is not None:
+            entry['rows_examined'] += rows_examined
+            entry['examined_rows_returned'] += rows_returned
+
+    def record_plan(self, query: str, plan_hash: str):
+        """Count a plan seen for the query's digest"""
+        plan_hashes = self._entry(query)['plan_hashes']
+        plan_hashes[plan_hash] = plan_hashes.get(plan_hash, 0) + 1
+
+    @staticmethod
+    def histogram(entry: Dict) -> Dict[str, int]:
+        """Non-empty latency buckets of a digest, labelled by their upper bound"""
+        labels = [f"≤{bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {label: count for label, count in zip(labels, entry['buckets']) if count}
+
+    def report(self, sort_by: str = 'total_time', top: Optional[int] = 10) -> List[Dict]:
+        """Per-digest summary rows sorted by one of DIGEST_SORT_KEYS, largest first"""
+        if sort_by not in DIGEST_SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort_by}")
+        rows = []
+        for digest, entry in self.digests.items():
+            latencies = np.array(entry['latencies'])
+            rows.append({
+                'digest': digest,
+                'fingerprint': entry['fingerprint'],
+                'descriptions': entry['descriptions'],
+                'count': len(latencies),
+                'total_time': float(latencies.sum()) if latencies.size else 0.0,
+                'mean_time': float(latencies.mean()) if latencies.size else 0.0,
+                'p50_time': float(np.percentile(latencies, 50)) if latencies.size else 0.0,
+                'p95_time': float(np.percentile(latencies, 95)) if latencies.size else 0.0,
+                'max_time': float(latencies.max()) if latencies.size else 0.0,
+                'rows_returned': entry['rows_returned'],
+                'rows_examined': entry['rows_examined'],
+                'examined_per_returned': entry['rows_examined'] / max(entry['examined_rows_returned'], 1),
+                'plans': len(entry['plan_hashes']),
+                'cache_hits': entry['cache_hits'],
+                'histogram': self.histogram(entry),
+            })
+        rows.sort(key=lambda row: -row[sort_by])
+        return rows[:top] if top else rows
@@ -1,73 +1,236 @@
-# Assignment 5 Setup Guide
-**PROG8850 - Database Automation**
-
-## Alternative Setup Options
-
-Since you may not have Docker or Ansible running, here are alternative ways to complete Assignment 5:
-
-### Option 1: Local MySQL Installation
-
-If you have MySQL installed locally:
-
-1. **Start MySQL Service:**
-   ```powershell
-   # Using Windows Services
-   net start mysql
-   # OR if you have MySQL Workbench, start it from there
-   ```
-
-2. **Create database and user:**
-   ```sql
-   -- Connect to MySQL as root
-   CREATE DATABASE IF NOT EXISTS ecommerce_db;
-   CREATE USER IF NOT EXISTS 'root'@'127.0.0.1' IDENTIFIED BY 'Secret5555';
-   GRANT ALL PRIVILEGES ON ecommerce_db.* TO 'root'@'127.0.0.1';
-   FLUSH PRIVILEGES;
-   ```
-
-### Option 2: Docker Desktop (Recommended)
-
-1. **Start Docker Desktop** from Windows Start Menu
-2. **Wait for Docker to fully start** (green status)
-3. **Run the MySQL container:**
-   ```powershell
-   cd "c:\Users\premc\OneDrive\Documentos\DatabaseAutomation\PROG8850-Assignment5"
-   docker-compose -f mysql-adminer.yml up -d
-   ```
-
-### Option 3: Using In-Memory SQLite (For Testing)
-
-If MySQL setup is problematic, I can modify the scripts to use SQLite for demonstration:
-
-<function_calls>
-<invoke name="create_file">
-<parameter name="content">"""
+"""
 SQLite version of the performance tester for cases where MySQL isn't available
 Assignment 5 - PROG8850 (Alternative implementation)
 """
 
 import sqlite3
+import multiprocessing
+import numpy as np
 import pandas as pd
 import time
 import os
-from typing import Dict, List
+import math
+import argparse
+from queue import Empty
+from typing import Dict, List, Optional
 import random
+from time_budget import CensoredTime, TimeBudget, format_improvement
+
+# Workloads shared by the single-connection tests and the multi-process benchmark
+SCALAR_QUERIES = [
+    ("SELECT * FROM order_items WHERE price > 100", "Price filter > 100"),
+    ("SELECT * FROM order_items WHERE price BETWEEN 50 AND 200", "Price range 50-200"),
+    ("SELECT order_id, SUM(price) as total FROM order_items GROUP BY order_id HAVING total > 500", "Order total > 500"),
+    ("SELECT * FROM orders WHERE order_purchase_timestamp >= '2018-01-01'", "Orders after 2018-01-01"),
+    ("SELECT COUNT(*) FROM order_items WHERE freight_value > 20", "Count freight > 20"),
+    ("SELECT AVG(price) FROM order_items WHERE price < 1000", "Average price < 1000"),
+]
+
+TEXT_SEARCH_QUERIES = [
+    ("SELECT * FROM order_reviews WHERE review_comment_message LIKE '%produto%'", "Search for 'produto'"),
+    ("SELECT * FROM order_reviews WHERE review_comment_message LIKE '%entrega%'", "Search for 'entrega'"),
+    ("SELECT * FROM order_reviews WHERE review_comment_message LIKE '%qualidade%' AND review_comment_message LIKE '%excelente%'", "Search 'qualidade excelente'"),
+    ("SELECT * FROM order_reviews WHERE review_comment_message LIKE '%rapido%' AND review_comment_message LIKE '%entrega%'", "Search 'rapido entrega'"),
+    ("SELECT review_score, COUNT(*) FROM order_reviews WHERE review_comment_message LIKE '%recomendo%' GROUP BY review_score", "Search 'recomendo' grouped by score"),
+]
+
+# Named SQLite tuning profiles: pragmas applied on connect, whether the sample
+# data load runs as one wrapping transaction, and whether ANALYZE/optimize run
+# after the load. page_size only takes effect on a new database file.
+TUNING_PROFILES = {
+    'default': {
+        'pragmas': {},
+        'single_transaction': False,
+        'optimize_after_load': False,
+    },
+    'bulk_load': {
+        'pragmas': {'journal_mode': 'OFF', 'synchronous': 'OFF', 'cache_size': -262144, 'temp_store': 'MEMORY'},
+        'single_transaction': True,
+        'optimize_after_load': False,
+    },
+    'bulk_load_wal': {
+        'pragmas': {'journal_mode': 'WAL', 'synchronous': 'OFF', 'cache_size': -262144, 'temp_store': 'MEMORY'},
+        'single_transaction': True,
+        'optimize_after_load': False,
+    },
+    'read_optimized': {
+        'pragmas': {'page_size': 8192, 'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'cache_size': -65536,
+                    'mmap_size': 268435456, 'temp_store': 'MEMORY'},
+        'single_transaction': True,
+        'optimize_after_load': True,
+    },
+}
+
+# Seconds past the end of a run the parent waits for worker results (covers the 30s busy timeout)
+RESULT_GRACE_SECONDS = 60.0
+
+def _haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in km (registered as the SQL function haversine_km)"""
+    if None in (lat1, lng1, lat2, lng2):
+        return None
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(a))
+
+def _concurrent_reader(db_path: str, queries: List[str], start_at: float, duration: float, results):
+    """Reader process: run the workload round-robin until the deadline
+    
+    Always puts ('reader', samples, error) on the results queue, where samples
+    are (wall-clock start, latency) pairs and error is None or the message of
+    the exception that stopped the reader early.
+    """
+    samples = []
+    error = None
+    try:
+        connection = sqlite3.connect(db_path, timeout=30)
+        try:
+            connection.execute("PRAGMA query_only = ON")
+            time.sleep(max(0.0, start_at - time.time()))
+            deadline = start_at + duration
+            i = 0
+            while time.time() < deadline:
+                started = time.time()
+                query_start = time.perf_counter()
+                connection.execute(queries[i % len(queries)]).fetchall()
+                samples.append((started, time.perf_counter() - query_start))
+                i += 1
+        finally:
+            connection.close()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    results.put(('reader', samples, error))
+
+def _concurrent_writer(db_path: str, start_at: float, duration: float, checkpoint_every: int, results):
+    """Writer process: small update transactions with periodic explicit WAL checkpoints
+    
+    Automatic checkpoints are disabled so every checkpoint is one of ours and
+    can be timed. Always puts ('writer', (commit latencies, checkpoint
+    (start, duration) windows), error) on the results queue.
+    """
+    commit_latencies = []
+    checkpoints = []
+    error = None
+    try:
+        connection = sqlite3.connect(db_path, timeout=30)
+        try:
+            connection.execute("PRAGMA wal_autocheckpoint = 0")
+            order_count = connection.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+            statuses = ['delivered', 'shipped', 'processing']
+            time.sleep(max(0.0, start_at - time.time()))
+            deadline = start_at + duration
+            while time.time() < deadline:
+                write_start = time.perf_counter()
+                order_id = f'o{random.randint(1, order_count)}'
+                connection.execute("UPDATE orders SET order_status = ? WHERE order_id = ?",
+                                   (random.choice(statuses), order_id))
+                connection.execute("UPDATE order_items SET freight_value = freight_value WHERE order_id = ?",
+                                   (order_id,))
+                connection.commit()
+                commit_latencies.append(time.perf_counter() - write_start)
+                
+                if len(commit_latencies) % checkpoint_every == 0:
+                    started = time.time()
+                    checkpoint_start = time.perf_counter()
+                    connection.execute("PRAGMA wal_checkpoint(RESTART)").fetchall()
+                    checkpoints.append((started, time.perf_counter() - checkpoint_start))
+        finally:
+            connection.close()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    results.put(('writer', (commit_latencies, checkpoints), error))
+
+def _collect_worker_results(processes: List[multiprocessing.Process], results, deadline: float) -> List[tuple]:
+    """Gather one result per worker process without blocking on workers that died
+    
+    Stops waiting once every process has exited (after draining what they
+    sent) or at deadline, whichever comes first.
+    """
+    collected = []
+    while len(collected) < len(processes):
+        try:
+            collected.append(results.get(timeout=1.0))
+            continue
+        except Empty:
+            pass
+        if all(process.exitcode is not None for process in processes) or time.time() > deadline:
+            while len(collected) < len(processes):
+                try:
+                    collected.append(results.get(timeout=0.1))
+                except Empty:
+                    break
+            break
+    return collected
 
 class SQLitePerformanceTester:
-    def __init__(self, db_path='ecommerce.db'):
+    def __init__(self, db_path='ecommerce.db', profile: Optional[str] = None):
         """Initialize SQLite database connection"""
         self.db_path = db_path
+        self.profile = profile
         self.connection = None
         self.cursor = None
+        self.insert_time = 0.0
+        self.time_budget = TimeBudget()
         
     def connect(self):
-        """Establish database connection"""
+        """Establish database connection and apply the tuning profile's pragmas"""
         try:
             self.connection = sqlite3.connect(self.db_path)
             self.cursor = self.connection.cursor()
+            self.connection.create_function('haversine_km', 4, _haversine_km, deterministic=True)
             print(f"✅ Connected to SQLite database: {self.db_path}")
+            if self.profile:
+                self.apply_profile(self.profile)
         except sqlite3.Error as err:
             print(f"❌ Error connecting to SQLite: {err}")
+    
+    def apply_profile(self, profile: str):
+        """Apply the pragmas of a named tuning profile to the open connection"""
+        self.profile = profile
+        for pragma, value in TUNING_PROFILES[profile]['pragmas'].items():
+            self.cursor.execute(f"PRAGMA {pragma} = {value}")
+        print(f"⚙️  Applied SQLite tuning profile: {profile}")
+    
+    def optimize_after_load(self):
+        """Refresh planner statistics after a load (ANALYZE + PRAGMA optimize)"""
+        self.cursor.execute("ANALYZE")
+        self.cursor.execute("PRAGMA optimize")
+        self.connection.commit()
+            
+    def snapshot(self, path: str) -> float:
+        """Copy the open database to path with the SQLite backup API; returns seconds taken"""
+        start_time = time.time()
+        try:
+            self.connection.commit()
+            target = sqlite3.connect(path)
+            try:
+                self.connection.backup(target)
+            finally:
+                target.close()
+        except sqlite3.Error as err:
+            print(f"❌ Error taking snapshot: {err}")
+            return 0.0
+        
+        elapsed = time.time() - start_time
+        print(f"📸 Snapshot saved to {path} in {elapsed:.2f} seconds")
+        return elapsed
+    
+    def restore(self, path: str) -> float:
+        """Overwrite the open database with a snapshot taken by snapshot(); returns seconds taken"""
+        start_time = time.time()
+        try:
+            self.connection.commit()
+            source = sqlite3.connect(path)
+            try:
+                source.backup(self.connection)
+            finally:
+                source.close()
+        except sqlite3.Error as err:
+            print(f"❌ Error restoring snapshot: {err}")
+            return 0.0
+        
+        elapsed = time.time() - start_time
+        print(f"⏪ Restored {path} in {elapsed:.2f} seconds")
+        return elapsed
             
     def disconnect(self):
         """Close database connection"""
@@ -90,6 +253,8 @@ class SQLitePerformanceTester:
             DROP TABLE IF EXISTS product_category_name_translation;
             DROP TABLE IF EXISTS sellers;
             DROP TABLE IF EXISTS customers;
+            DROP TABLE IF EXISTS geolocation_rtree;
+            DROP TABLE IF EXISTS geolocation;
             
             -- Customers table
             CREATE TABLE customers (
@@ -178,6 +343,15 @@ class SQLitePerformanceTester:
                 review_answer_timestamp TEXT,
                 FOREIGN KEY (order_id) REFERENCES orders(order_id)
             );
+            
+            -- Geolocation table
+            CREATE TABLE geolocation (
+                geolocation_zip_code_prefix INTEGER,
+                geolocation_lat REAL,
+                geolocation_lng REAL,
+                geolocation_city TEXT,
+                geolocation_state TEXT
+            );
             '''
             
             # Execute each statement
@@ -190,9 +364,29 @@ class SQLitePerformanceTester:
         except Exception as e:
             print(f"❌ Error creating schema: {e}")
     
-    def create_sample_data(self):
-        """Create sample data for testing"""
+    def _insert_rows(self, sql: str, rows: List[tuple], commit: bool = False):
+        """executemany() a batch of rows, timing the time spent in SQLite"""
+        start_time = time.perf_counter()
+        self.cursor.executemany(sql, rows)
+        if commit:
+            self.connection.commit()
+        self.insert_time += time.perf_counter() - start_time
+    
+    def create_sample_data(self, scale: int = 1, commit_per_table: bool = False) -> int:
+        """Create sample data for testing
+        
+        scale multiplies the number of customers, products, sellers, orders and
+        reviews. All inserts run in one transaction unless commit_per_table is
+        set. Returns the number of rows inserted; the time spent inside SQLite
+        (inserts and commits) is left in self.insert_time.
+        """
         print("🔧 Creating sample data for testing...")
+        self.insert_time = 0.0
+        customer_count = 500 * scale
+        product_count = 200 * scale
+        seller_count = 50 * scale
+        order_count = 1000 * scale
+        review_count = 800 * scale
         
         # Sample categories
         categories = [
@@ -203,14 +397,11 @@ class SQLitePerformanceTester:
             ('esportes', 'sports')
         ]
         
-        self.cursor.executemany(
-            "INSERT INTO product_category_name_translation VALUES (?, ?)",
-            categories
-        )
+        self._insert_rows("INSERT INTO product_category_name_translation VALUES (?, ?)", categories, commit_per_table)
         
         # Sample customers
         customers_data = []
-        for i in range(1, 501):
+        for i in range(1, customer_count + 1):
             customers_data.append((
                 f'c{i}',
                 f'cu{i}',
@@ -219,15 +410,12 @@ class SQLitePerformanceTester:
                 random.choice(['SP', 'RJ', 'DF', 'BA', 'CE'])
             ))
         
-        self.cursor.executemany(
-            "INSERT INTO customers VALUES (?, ?, ?, ?, ?)",
-            customers_data
-        )
+        self._insert_rows("INSERT INTO customers VALUES (?, ?, ?, ?, ?)", customers_data, commit_per_table)
         
         # Sample products
         products_data = []
         category_names = [cat[0] for cat in categories]
-        for i in range(1, 201):
+        for i in range(1, product_count + 1):
             products_data.append((
                 f'p{i}',
                 random.choice(category_names),
@@ -240,14 +428,11 @@ class SQLitePerformanceTester:
                 random.randint(8, 40)
             ))
         
-        self.cursor.executemany(
-            "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            products_data
-        )
+        self._insert_rows("INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", products_data, commit_per_table)
         
         # Sample sellers
         sellers_data = []
-        for i in range(1, 51):
+        for i in range(1, seller_count + 1):
             sellers_data.append((
                 f's{i}',
                 random.randint(10000, 99999),
@@ -255,15 +440,34 @@ class SQLitePerformanceTester:
                 random.choice(['SP', 'RJ', 'DF', 'BA', 'CE'])
             ))
         
-        self.cursor.executemany(
-            "INSERT INTO sellers VALUES (?, ?, ?, ?)",
-            sellers_data
-        )
+        self._insert_rows("INSERT INTO sellers VALUES (?, ?, ?, ?)", sellers_data, commit_per_table)
+        
+        # Sample geolocation: a few points around a city centre for every customer/seller zip prefix
+        city_centres = {
+            'São Paulo': (-23.5505, -46.6333, 'SP'),
+            'Rio de Janeiro': (-22.9068, -43.1729, 'RJ'),
+            'Brasília': (-15.7939, -47.8828, 'DF'),
+            'Salvador': (-12.9777, -38.5016, 'BA'),
+            'Fortaleza': (-3.7319, -38.5267, 'CE'),
+        }
+        geolocation_data = []
+        for zip_code, city in {(row[2], row[3]) for row in customers_data} | {(row[1], row[2]) for row in sellers_data}:
+            lat, lng, state = city_centres[city]
+            for _ in range(3):
+                geolocation_data.append((
+                    zip_code,
+                    round(lat + random.uniform(-0.2, 0.2), 8),
+                    round(lng + random.uniform(-0.2, 0.2), 8),
+                    city,
+                    state
+                ))
+        
+        self._insert_rows("INSERT INTO geolocation VALUES (?, ?, ?, ?, ?)", geolocation_data, commit_per_table)
         
         # Sample orders
         orders_data = []
-        customer_ids = [f'c{i}' for i in range(1, 501)]
-        for i in range(1, 1001):
+        customer_ids = [f'c{i}' for i in range(1, customer_count + 1)]
+        for i in range(1, order_count + 1):
             orders_data.append((
                 f'o{i}',
                 random.choice(customer_ids),
@@ -275,17 +479,14 @@ class SQLitePerformanceTester:
                 f'2018-{random.randint(1,12):02d}-{random.randint(1,28):02d} {random.randint(8,22):02d}:{random.randint(0,59):02d}:00'
             ))
         
-        self.cursor.executemany(
-            "INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            orders_data
-        )
+        self._insert_rows("INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?)", orders_data, commit_per_table)
         
         # Sample order items
         order_items_data = []
-        product_ids = [f'p{i}' for i in range(1, 201)]
-        seller_ids = [f's{i}' for i in range(1, 51)]
+        product_ids = [f'p{i}' for i in range(1, product_count + 1)]
+        seller_ids = [f's{i}' for i in range(1, seller_count + 1)]
         
-        for i in range(1, 1001):
+        for i in range(1, order_count + 1):
             items_count = random.randint(1, 5)
             for j in range(1, items_count + 1):
                 order_items_data.append((
@@ -298,14 +499,11 @@ class SQLitePerformanceTester:
                     round(random.uniform(5, 50), 2)
                 ))
         
-        self.cursor.executemany(
-            "INSERT INTO order_items VALUES (?, ?, ?, ?, ?, ?, ?)",
-            order_items_data
-        )
+        self._insert_rows("INSERT INTO order_items VALUES (?, ?, ?, ?, ?, ?, ?)", order_items_data, commit_per_table)
         
         # Sample order payments
         order_payments_data = []
-        for i in range(1, 1001):
+        for i in range(1, order_count + 1):
             order_payments_data.append((
                 f'o{i}',
                 1,
@@ -314,10 +512,7 @@ class SQLitePerformanceTester:
                 round(random.uniform(20, 1000), 2)
             ))
         
-        self.cursor.executemany(
-            "INSERT INTO order_payments VALUES (?, ?, ?, ?, ?)",
-            order_payments_data
-        )
+        self._insert_rows("INSERT INTO order_payments VALUES (?, ?, ?, ?, ?)", order_payments_data, commit_per_table)
         
         # Sample order reviews
         review_comments = [
@@ -334,7 +529,7 @@ class SQLitePerformanceTester:
         ]
         
         order_reviews_data = []
-        for i in range(1, 801):
+        for i in range(1, review_count + 1):
             order_reviews_data.append((
                 f'r{i}',
                 f'o{i}',
@@ -345,21 +540,44 @@ class SQLitePerformanceTester:
                 f'2018-{random.randint(1,12):02d}-{random.randint(1,28):02d} {random.randint(8,22):02d}:{random.randint(0,59):02d}:00'
             ))
         
-        self.cursor.executemany(
-            "INSERT INTO order_reviews VALUES (?, ?, ?, ?, ?, ?, ?)",
-            order_reviews_data
-        )
+        self._insert_rows("INSERT INTO order_reviews VALUES (?, ?, ?, ?, ?, ?, ?)", order_reviews_data, commit_per_table)
         
+        commit_start = time.perf_counter()
         self.connection.commit()
+        self.insert_time += time.perf_counter() - commit_start
         print("✅ Sample data created successfully!")
-        print(f"   - 500 customers")
-        print(f"   - 1000 orders")
+        print(f"   - {customer_count} customers")
+        print(f"   - {order_count} orders")
         print(f"   - {len(order_items_data)} order items")
-        print(f"   - 800 reviews")
+        print(f"   - {review_count} reviews")
+        print(f"   - {len(geolocation_data)} geolocation points")
+        
+        return (len(categories) + len(customers_data) + len(products_data) + len(sellers_data)
+                + len(geolocation_data) + len(orders_data) + len(order_items_data) + len(order_payments_data) + len(order_reviews_data))
+    
+    def set_time_budget(self, query_timeout: Optional[float] = None, suite_timeout: Optional[float] = None):
+        """Limit every timed query to query_timeout seconds and all of them together to suite_timeout"""
+        self.time_budget = TimeBudget(query_timeout, suite_timeout)
     
-    def time_query(self, query: str, description: str) -> float:
-        """Execute a query and measure execution time"""
+    def time_query(self, query: str, description: str, timeout: Optional[float] = None) -> float:
+        """Execute a query and measure execution time
+        
+        The query is limited to timeout seconds (default: what the time budget
+        allows) by a progress handler that interrupts it; an interrupted query
+        returns a CensoredTime, and once the suite budget is spent queries are
+        skipped and return CensoredTime(0).
+        """
+        if timeout is None:
+            timeout = self.time_budget.next_timeout()
+        if timeout is not None and timeout <= 0:
+            print(f"⏭️  Skipped {description}: suite time budget exhausted")
+            return CensoredTime(0.0, 'suite budget exhausted')
+        
         start_time = time.time()
+        if timeout:
+            deadline = start_time + timeout
+            # Checked every 10000 virtual machine instructions; a non-zero return interrupts the query
+            self.connection.set_progress_handler(lambda: int(time.time() > deadline), 10000)
         try:
             self.cursor.execute(query)
             results = self.cursor.fetchall()
@@ -373,9 +591,21 @@ class SQLitePerformanceTester:
             print()
             
             return execution_time
+        except sqlite3.OperationalError as err:
+            if timeout and str(err) == 'interrupted':
+                elapsed = time.time() - start_time
+                print(f"⏳ {description}")
+                print(f"   Interrupted after {elapsed:.4f} seconds (limit {timeout:.2f}s); recorded as censored")
+                print()
+                return CensoredTime(elapsed)
+            print(f"❌ Error executing query: {err}")
+            return -1
         except sqlite3.Error as err:
             print(f"❌ Error executing query: {err}")
             return -1
+        finally:
+            if timeout:
+                self.connection.set_progress_handler(None, 0)
     
     def explain_query(self, query: str, description: str):
         """Use EXPLAIN to analyze query execution plan"""
@@ -400,17 +630,8 @@ class SQLitePerformanceTester:
         print("🔍 Running Scalar Field Performance Tests (SQLite)")
         print("=" * 50)
         
-        scalar_queries = [
-            ("SELECT * FROM order_items WHERE price > 100", "Price filter > 100"),
-            ("SELECT * FROM order_items WHERE price BETWEEN 50 AND 200", "Price range 50-200"),
-            ("SELECT order_id, SUM(price) as total FROM order_items GROUP BY order_id HAVING total > 500", "Order total > 500"),
-            ("SELECT * FROM orders WHERE order_purchase_timestamp >= '2018-01-01'", "Orders after 2018-01-01"),
-            ("SELECT COUNT(*) FROM order_items WHERE freight_value > 20", "Count freight > 20"),
-            ("SELECT AVG(price) FROM order_items WHERE price < 1000", "Average price < 1000"),
-        ]
-        
         results = {}
-        for query, description in scalar_queries:
+        for query, description in SCALAR_QUERIES:
             # First show the execution plan
             self.explain_query(query, description)
             # Then time the query
@@ -424,16 +645,8 @@ class SQLitePerformanceTester:
         print("🔍 Running Text Search Performance Tests (SQLite)")
         print("=" * 50)
         
-        fulltext_queries = [
-            ("SELECT * FROM order_reviews WHERE review_comment_message LIKE '%produto%'", "Search for 'produto'"),
-            ("SELECT * FROM order_reviews WHERE review_comment_message LIKE '%entrega%'", "Search for 'entrega'"),
-            ("SELECT * FROM order_reviews WHERE review_comment_message LIKE '%qualidade%' AND review_comment_message LIKE '%excelente%'", "Search 'qualidade excelente'"),
-            ("SELECT * FROM order_reviews WHERE review_comment_message LIKE '%rapido%' AND review_comment_message LIKE '%entrega%'", "Search 'rapido entrega'"),
-            ("SELECT review_score, COUNT(*) FROM order_reviews WHERE review_comment_message LIKE '%recomendo%' GROUP BY review_score", "Search 'recomendo' grouped by score"),
-        ]
-        
         results = {}
-        for query, description in fulltext_queries:
+        for query, description in TEXT_SEARCH_QUERIES:
             # First show the execution plan
             self.explain_query(query, description)
             # Then time the query
@@ -469,14 +682,94 @@ class SQLitePerformanceTester:
                     print(f"❌ Error creating {description}: {err}")
         print()
     
-    def run_complete_performance_test(self):
-        """Run the complete performance testing suite"""
+    def create_spatial_index(self):
+        """Build an R*Tree virtual table over the geolocation points"""
+        print("🗺️  Creating R*Tree spatial index on geolocation")
+        print("=" * 50)
+        try:
+            self.cursor.execute("DROP TABLE IF EXISTS geolocation_rtree")
+            self.cursor.execute("CREATE VIRTUAL TABLE geolocation_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng)")
+            self.cursor.execute(
+                "INSERT INTO geolocation_rtree "
+                "SELECT rowid, geolocation_lat, geolocation_lat, geolocation_lng, geolocation_lng FROM geolocation "
+                "WHERE geolocation_lat IS NOT NULL AND geolocation_lng IS NOT NULL")
+            self.connection.commit()
+            print("✅ R*Tree spatial index created successfully")
+        except sqlite3.Error as err:
+            print(f"❌ Error creating R*Tree index (is the rtree module compiled in?): {err}")
+        print()
+    
+    def run_spatial_tests(self, radius_km: float = 10.0, nearest_count: int = 5) -> Dict[str, tuple]:
+        """Compare radius and nearest-seller lookups: lat/lng range scans vs the R*Tree
+        
+        Uses the location of the first customer that has a geolocation match.
+        Run create_spatial_index() first.
+        """
+        print("🔍 Running Spatial Query Tests (lat/lng range scan vs R*Tree)")
+        print("=" * 50)
+        
+        self.cursor.execute(
+            "SELECT c.customer_id, g.geolocation_lat, g.geolocation_lng FROM customers c "
+            "JOIN geolocation g ON g.geolocation_zip_code_prefix = c.customer_zip_code_prefix LIMIT 1")
+        row = self.cursor.fetchone()
+        if row is None:
+            print("⚠️  No customer with a matching geolocation row")
+            return {}
+        customer_id, lat, lng = row
+        print(f"   Centre: customer {customer_id} at ({lat:.5f}, {lng:.5f}), radius {radius_km} km")
+        
+        lat_delta = radius_km / 111.32
+        lng_delta = radius_km / (111.32 * max(math.cos(math.radians(lat)), 0.01))
+        min_lat, max_lat, min_lng, max_lng = lat - lat_delta, lat + lat_delta, lng - lng_delta, lng + lng_delta
+        range_filter = (f"g.geolocation_lat BETWEEN {min_lat} AND {max_lat} "
+                        f"AND g.geolocation_lng BETWEEN {min_lng} AND {max_lng}")
+        rtree_filter = (f"r.min_lat >= {min_lat} AND r.max_lat <= {max_lat} "
+                        f"AND r.min_lng >= {min_lng} AND r.max_lng <= {max_lng}")
+        distance = f"haversine_km(g.geolocation_lat, g.geolocation_lng, {lat}, {lng})"
+        
+        spatial_queries = [
+            (f"SELECT COUNT(*) FROM geolocation g WHERE {range_filter} AND {distance} <= {radius_km}",
+             f"SELECT COUNT(*) FROM geolocation_rtree r JOIN geolocation g ON g.rowid = r.id "
+             f"WHERE {rtree_filter} AND {distance} <= {radius_km}",
+             f"Geolocation points within {radius_km} km of customer"),
+            (f"SELECT s.seller_id, MIN({distance}) AS distance FROM sellers s "
+             f"JOIN geolocation g ON g.geolocation_zip_code_prefix = s.seller_zip_code_prefix "
+             f"WHERE {range_filter} GROUP BY s.seller_id ORDER BY distance LIMIT {nearest_count}",
+             f"SELECT s.seller_id, MIN({distance}) AS distance FROM geolocation_rtree r "
+             f"JOIN geolocation g ON g.rowid = r.id "
+             f"JOIN sellers s ON s.seller_zip_code_prefix = g.geolocation_zip_code_prefix "
+             f"WHERE {rtree_filter} GROUP BY s.seller_id ORDER BY distance LIMIT {nearest_count}",
+             f"{nearest_count} nearest sellers to customer"),
+        ]
+        
+        results = {}
+        for range_query, rtree_query, description in spatial_queries:
+            self.explain_query(rtree_query, f"{description} (R*Tree)")
+            range_time = self.time_query(range_query, f"{description} (lat/lng range scan)")
+            rtree_time = self.time_query(rtree_query, f"{description} (R*Tree)")
+            results[description] = (range_time, rtree_time)
+        
+        return results
+    
+    def run_complete_performance_test(self, include_spatial: bool = False, snapshot_path: Optional[str] = None):
+        """Run the complete performance testing suite
+        
+        With include_spatial=True the R*Tree is built and the radius and
+        nearest-seller queries are compared against lat/lng range scans.
+        With snapshot_path the loaded, unindexed database is restored from that
+        file if it exists, and saved there after loading otherwise.
+        """
         print("🚀 Starting Complete Database Performance Test (SQLite Demo)")
         print("=" * 60)
         
-        # Create schema and data
-        self.create_database_schema()
-        self.create_sample_data()
+        # Create schema and data (or reset to the loaded, unindexed snapshot)
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.restore(snapshot_path)
+        else:
+            self.create_database_schema()
+            self.create_sample_data()
+            if snapshot_path:
+                self.snapshot(snapshot_path)
         
         # Test queries before indexing
         print("\n📊 BEFORE INDEXING")
@@ -502,38 +795,241 @@ class SQLitePerformanceTester:
             before_time = scalar_before[test_name]
             after_time = scalar_after[test_name]
             if before_time > 0 and after_time > 0:
-                improvement = ((before_time - after_time) / before_time) * 100
                 print(f"  {test_name}:")
                 print(f"    Before: {before_time:.4f}s, After: {after_time:.4f}s")
-                print(f"    Improvement: {improvement:+.2f}%")
+                print(f"    Improvement: {format_improvement(before_time, after_time)}")
         
         print("\nText Search Queries:")
         for test_name in fulltext_before:
             before_time = fulltext_before[test_name]
             after_time = fulltext_after[test_name]
             if before_time > 0 and after_time > 0:
-                improvement = ((before_time - after_time) / before_time) * 100
                 print(f"  {test_name}:")
                 print(f"    Before: {before_time:.4f}s, After: {after_time:.4f}s")
-                print(f"    Improvement: {improvement:+.2f}%")
+                print(f"    Improvement: {format_improvement(before_time, after_time)}")
+        
+        if include_spatial:
+            self.create_spatial_index()
+            spatial_results = self.run_spatial_tests()
+            
+            print("\nSpatial Queries:")
+            for test_name, (range_time, rtree_time) in spatial_results.items():
+                if range_time > 0 and rtree_time > 0:
+                    print(f"  {test_name}:")
+                    print(f"    Range scan: {range_time:.4f}s, R*Tree: {rtree_time:.4f}s")
+                    print(f"    Improvement: {format_improvement(range_time, rtree_time)}")
+    
+    def run_profile_benchmark(self, profiles: Optional[List[str]] = None, scale: int = 10) -> Dict[str, Dict]:
+        """Load the same sample data and run the same workload under each tuning profile
+        
+        Every profile gets a fresh database file next to db_path. Reports load
+        rows/sec (time spent in SQLite, excluding Python data generation, plus
+        ANALYZE/optimize where the profile runs them) and the per-query latency
+        of the scalar and text workloads.
+        """
+        profiles = profiles or list(TUNING_PROFILES)
+        base_path, extension = os.path.splitext(self.db_path)
+        original_path, original_profile = self.db_path, self.profile
+        
+        results = {}
+        for profile in profiles:
+            print(f"\n⚙️  PROFILE: {profile}")
+            print("=" * 30)
+            self.db_path = f"{base_path}_{profile}{extension}"
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(self.db_path + suffix):
+                    os.remove(self.db_path + suffix)
+            
+            self.profile = profile
+            self.connect()
+            try:
+                settings = TUNING_PROFILES[profile]
+                self.create_database_schema()
+                row_count = self.create_sample_data(scale=scale, commit_per_table=not settings['single_transaction'])
+                load_time = self.insert_time
+                if settings['optimize_after_load']:
+                    start_time = time.perf_counter()
+                    self.optimize_after_load()
+                    load_time += time.perf_counter() - start_time
+                
+                query_times = {}
+                query_times.update(self.run_scalar_field_tests())
+                query_times.update(self.run_fulltext_search_tests())
+                
+                results[profile] = {
+                    'rows_per_sec': row_count / load_time if load_time > 0 else 0.0,
+                    'load_time': load_time,
+                    'query_times': query_times,
+                }
+            finally:
+                self.disconnect()
+        
+        self.db_path, self.profile = original_path, original_profile
+        
+        print("\n📈 TUNING PROFILE COMPARISON")
+        print("=" * 40)
+        for profile, result in results.items():
+            valid_times = [t for t in result['query_times'].values() if t >= 0]
+            total_query_time = sum(valid_times)
+            print(f"  {profile}:")
+            print(f"    Load: {result['rows_per_sec']:,.0f} rows/sec ({result['load_time']:.2f}s)")
+            print(f"    Workload: {total_query_time:.4f}s total, {total_query_time / max(len(valid_times), 1):.4f}s mean per query")
+        
+        return results
+
+    
+    def run_concurrent_read_benchmark(self, reader_counts: List[int] = (1, 2, 4, 8), duration: float = 5.0,
+                                      with_writer: bool = False, checkpoint_every: int = 200) -> Dict[int, Dict]:
+        """Run the scalar and text workloads from N reader processes against a WAL copy of the database
+        
+        The database at db_path (created with sample data if empty) is copied
+        with the backup API to <name>_wal.db in WAL mode. For each N, N reader
+        processes (plus one writer if with_writer) run for `duration` seconds.
+        Reports aggregate throughput and latency percentiles, and with a writer
+        the checkpoint durations and reader p99 inside vs outside checkpoints.
+        Workers that fail or die are listed under 'errors' rather than stalling
+        the run.
+        """
+        print("🚀 Multi-process SQLite read scalability benchmark")
+        print("=" * 60)
+        
+        source = sqlite3.connect(self.db_path)
+        has_data = source.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'order_items'").fetchone()[0]
+        source.close()
+        if not has_data:
+            self.connect()
+            self.create_database_schema()
+            self.create_sample_data()
+            self.disconnect()
+        
+        base_path, extension = os.path.splitext(self.db_path)
+        wal_path = f"{base_path}_wal{extension}"
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(wal_path + suffix):
+                os.remove(wal_path + suffix)
+        source = sqlite3.connect(self.db_path)
+        target = sqlite3.connect(wal_path)
+        source.backup(target)
+        target.execute("PRAGMA journal_mode = WAL")
+        source.close()
+        target.close()
+        
+        queries = [query for query, _ in SCALAR_QUERIES + TEXT_SEARCH_QUERIES]
+        results = {}
+        for reader_count in reader_counts:
+            queue = multiprocessing.Queue()
+            start_at = time.time() + 1.0
+            processes = [multiprocessing.Process(target=_concurrent_reader,
+                                                 args=(wal_path, queries, start_at, duration, queue))
+                         for _ in range(reader_count)]
+            if with_writer:
+                processes.append(multiprocessing.Process(target=_concurrent_writer,
+                                                         args=(wal_path, start_at, duration, checkpoint_every, queue)))
+            for process in processes:
+                process.start()
+            
+            reader_samples = []
+            commit_latencies, checkpoints = [], []
+            errors = []
+            collected = _collect_worker_results(processes, queue, start_at + duration + RESULT_GRACE_SECONDS)
+            for kind, payload, error in collected:
+                if kind == 'reader':
+                    reader_samples.extend(payload)
+                else:
+                    commit_latencies, checkpoints = payload
+                if error:
+                    errors.append(f"{kind}: {error}")
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+            missing = len(processes) - len(collected)
+            if missing:
+                errors.append(f"{missing} worker(s) exited without a result "
+                              f"(exit codes {[process.exitcode for process in processes]})")
+            
+            latencies = np.array([latency for _, latency in reader_samples])
+            result = {
+                'queries': len(latencies),
+                'throughput': len(latencies) / duration,
+                'p50': float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+                'p95': float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+                'p99': float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+                'errors': errors,
+            }
+            if with_writer:
+                in_checkpoint = np.array([
+                    any(start <= started + latency and started <= start + length for start, length in checkpoints)
+                    for started, latency in reader_samples
+                ], dtype=bool)
+                result.update({
+                    'commits_per_sec': len(commit_latencies) / duration,
+                    'checkpoints': len(checkpoints),
+                    'checkpoint_max': max((length for _, length in checkpoints), default=0.0),
+                    'p99_during_checkpoint': float(np.percentile(latencies[in_checkpoint], 99)) if in_checkpoint.any() else 0.0,
+                    'p99_outside_checkpoint': float(np.percentile(latencies[~in_checkpoint], 99)) if (~in_checkpoint).any() else 0.0,
+                })
+            results[reader_count] = result
+            
+            print(f"  {reader_count} reader(s){' + writer' if with_writer else ''}:")
+            print(f"    Throughput: {result['throughput']:.1f} queries/sec ({result['queries']} queries)")
+            print(f"    Latency p50/p95/p99: {result['p50']:.4f}s / {result['p95']:.4f}s / {result['p99']:.4f}s")
+            if with_writer:
+                print(f"    Writer: {result['commits_per_sec']:.1f} commits/sec, {result['checkpoints']} checkpoints "
+                      f"(max {result['checkpoint_max']:.4f}s)")
+                print(f"    Reader p99 during checkpoints: {result['p99_during_checkpoint']:.4f}s, "
+                      f"outside: {result['p99_outside_checkpoint']:.4f}s")
+            for error in errors:
+                print(f"    ⚠️  {error}")
+        
+        return results
 
 
 def main():
     """Main function to run the performance testing"""
+    parser = argparse.ArgumentParser(description="SQLite e-commerce performance tester")
+    parser.add_argument('--profile', choices=sorted(TUNING_PROFILES), help="Tuning profile to apply on connect")
+    parser.add_argument('--benchmark-profiles', action='store_true',
+                        help="Run the load and query workload under every tuning profile")
+    parser.add_argument('--scale', type=int, default=10, help="Sample data scale factor for --benchmark-profiles")
+    parser.add_argument('--concurrent-readers', help="Comma-separated reader process counts, e.g. 1,2,4,8")
+    parser.add_argument('--with-writer', action='store_true', help="Add a writer process to --concurrent-readers")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per --concurrent-readers step")
+    parser.add_argument('--spatial', action='store_true', help="Also run the R*Tree spatial query comparison")
+    parser.add_argument('--query-timeout', type=float,
+                        help="Seconds a timed query may run before it is interrupted and recorded as censored")
+    parser.add_argument('--suite-timeout', type=float,
+                        help="Seconds for all timed queries together; later queries are skipped")
+    parser.add_argument('--snapshot', metavar='PATH',
+                        help="Restore the loaded, unindexed database from PATH if it exists, otherwise save it there")
+    args = parser.parse_args()
+    
     print("🏪 Brazilian E-commerce Database Performance Analysis (SQLite Demo)")
     print("🎯 Assignment 5 - PROG8850")
     print("⚠️  Note: This is a SQLite demonstration version")
     print("=" * 60)
     
     # Initialize the tester
-    tester = SQLitePerformanceTester()
+    tester = SQLitePerformanceTester(profile=args.profile)
+    if args.query_timeout or args.suite_timeout:
+        tester.set_time_budget(args.query_timeout, args.suite_timeout)
+    
+    if args.benchmark_profiles:
+        tester.run_profile_benchmark(scale=args.scale)
+        return
+    
+    if args.concurrent_readers:
+        reader_counts = [int(count) for count in args.concurrent_readers.split(',')]
+        tester.run_concurrent_read_benchmark(reader_counts, duration=args.duration, with_writer=args.with_writer)
+        return
     
     try:
         # Connect to database
         tester.connect()
         
         # Run complete performance tests
-        tester.run_complete_performance_test()
+        tester.run_complete_performance_test(include_spatial=args.spatial, snapshot_path=args.snapshot)
         
     finally:
         tester.disconnect()
@@ -0,0 +1,132 @@
+-- Pre-aggregated summary tables for the order-total and average-price queries
+-- Assignment 5 - Database Indexing and Performance
+--
+-- Optional materialised-aggregate layer on top of ecommerce_schema.sql.
+-- The triggers keep the summaries current for every INSERT/UPDATE/DELETE on
+-- order_items (including the CSV loader), so the aggregate workload can read
+-- a handful of rows instead of rescanning order_items.
+-- The UPDATE triggers assume order_id and product_id of an item never change;
+-- run DatabasePerformanceTester.refresh_summary_tables() after any such edit.
+
+USE ecommerce_db;
+
+DROP TRIGGER IF EXISTS trg_order_items_totals_insert;
+DROP TRIGGER IF EXISTS trg_order_items_totals_update;
+DROP TRIGGER IF EXISTS trg_order_items_totals_delete;
+DROP TRIGGER IF EXISTS trg_order_items_daily_insert;
+DROP TRIGGER IF EXISTS trg_order_items_daily_update;
+DROP TRIGGER IF EXISTS trg_order_items_daily_delete;
+DROP TRIGGER IF EXISTS trg_order_items_category_insert;
+DROP TRIGGER IF EXISTS trg_order_items_category_update;
+DROP TRIGGER IF EXISTS trg_order_items_category_delete;
+
+DROP TABLE IF EXISTS order_totals;
+DROP TABLE IF EXISTS daily_price_stats;
+DROP TABLE IF EXISTS category_price_stats;
+
+-- Per-order totals (serves "Order total > 500")
+CREATE TABLE order_totals (
+    order_id VARCHAR(32) PRIMARY KEY,
+    item_count INT NOT NULL,
+    total_price DECIMAL(12,2) NOT NULL,
+    total_freight DECIMAL(12,2) NOT NULL,
+    INDEX idx_order_totals_total_price (total_price)
+);
+
+-- Per-day price statistics, keyed on the order purchase date
+CREATE TABLE daily_price_stats (
+    sale_date DATE PRIMARY KEY,
+    item_count INT NOT NULL,
+    price_sum DECIMAL(14,2) NOT NULL,
+    freight_sum DECIMAL(14,2) NOT NULL
+);
+
+-- Per-category price statistics (serves AVG(price) style queries)
+CREATE TABLE category_price_stats (
+    product_category_name VARCHAR(50) PRIMARY KEY,
+    item_count INT NOT NULL,
+    price_sum DECIMAL(14,2) NOT NULL,
+    freight_sum DECIMAL(14,2) NOT NULL
+);
+
+-- order_totals maintenance
+CREATE TRIGGER trg_order_items_totals_insert AFTER INSERT ON order_items
+FOR EACH ROW
+    INSERT INTO order_totals (order_id, item_count, total_price, total_freight)
+    VALUES (NEW.order_id, 1, COALESCE(NEW.price, 0), COALESCE(NEW.freight_value, 0))
+    ON DUPLICATE KEY UPDATE
+        item_count = item_count + 1,
+        total_price = total_price + COALESCE(NEW.price, 0),
+        total_freight = total_freight + COALESCE(NEW.freight_value, 0);
+
+CREATE TRIGGER trg_order_items_totals_update AFTER UPDATE ON order_items
+FOR EACH ROW
+    UPDATE order_totals
+    SET total_price = total_price - COALESCE(OLD.price, 0) + COALESCE(NEW.price, 0),
+        total_freight = total_freight - COALESCE(OLD.freight_value, 0) + COALESCE(NEW.freight_value, 0)
+    WHERE order_id = NEW.order_id;
+
+CREATE TRIGGER trg_order_items_totals_delete AFTER DELETE ON order_items
+FOR EACH ROW
+    UPDATE order_totals
+    SET item_count = item_count - 1,
+        total_price = total_price - COALESCE(OLD.price, 0),
+        total_freight = total_freight - COALESCE(OLD.freight_value, 0)
+    WHERE order_id = OLD.order_id;
+
+-- daily_price_stats maintenance
+CREATE TRIGGER trg_order_items_daily_insert AFTER INSERT ON order_items
+FOR EACH ROW
+    INSERT INTO daily_price_stats (sale_date, item_count, price_sum, freight_sum)
+    SELECT DATE(o.order_purchase_timestamp), 1, COALESCE(NEW.price, 0), COALESCE(NEW.freight_value, 0)
+    FROM orders o
+    WHERE o.order_id = NEW.order_id AND o.order_purchase_timestamp IS NOT NULL
+    ON DUPLICATE KEY UPDATE
+        item_count = item_count + 1,
+        price_sum = price_sum + COALESCE(NEW.price, 0),
+        freight_sum = freight_sum + COALESCE(NEW.freight_value, 0);
+
+CREATE TRIGGER trg_order_items_daily_update AFTER UPDATE ON order_items
+FOR EACH ROW
+    UPDATE daily_price_stats d
+    JOIN orders o ON d.sale_date = DATE(o.order_purchase_timestamp)
+    SET d.price_sum = d.price_sum - COALESCE(OLD.price, 0) + COALESCE(NEW.price, 0),
+        d.freight_sum = d.freight_sum - COALESCE(OLD.freight_value, 0) + COALESCE(NEW.freight_value, 0)
+    WHERE o.order_id = NEW.order_id;
+
+CREATE TRIGGER trg_order_items_daily_delete AFTER DELETE ON order_items
+FOR EACH ROW
+    UPDATE daily_price_stats d
+    JOIN orders o ON d.sale_date = DATE(o.order_purchase_timestamp)
+    SET d.item_count = d.item_count - 1,
+        d.price_sum = d.price_sum - COALESCE(OLD.price, 0),
+        d.freight_sum = d.freight_sum - COALESCE(OLD.freight_value, 0)
+    WHERE o.order_id = OLD.order_id;
+
+-- category_price_stats maintenance (products without a category count as 'unknown')
+CREATE TRIGGER trg_order_items_category_insert AFTER INSERT ON order_items
+FOR EACH ROW
+    INSERT INTO category_price_stats (product_category_name, item_count, price_sum, freight_sum)
+    VALUES (
+        COALESCE((SELECT p.product_category_name FROM products p WHERE p.product_id = NEW.product_id), 'unknown'),
+        1, COALESCE(NEW.price, 0), COALESCE(NEW.freight_value, 0)
+    )
+    ON DUPLICATE KEY UPDATE
+        item_count = item_count + 1,
+        price_sum = price_sum + COALESCE(NEW.price, 0),
+        freight_sum = freight_sum + COALESCE(NEW.freight_value, 0);
+
+CREATE TRIGGER trg_order_items_category_update AFTER UPDATE ON order_items
+FOR EACH ROW
+    UPDATE category_price_stats
+    SET price_sum = price_sum - COALESCE(OLD.price, 0) + COALESCE(NEW.price, 0),
+        freight_sum = freight_sum - COALESCE(OLD.freight_value, 0) + COALESCE(NEW.freight_value, 0)
+    WHERE product_category_name = COALESCE((SELECT p.product_category_name FROM products p WHERE p.product_id = NEW.product_id), 'unknown');
+
+CREATE TRIGGER trg_order_items_category_delete AFTER DELETE ON order_items
+FOR EACH ROW
+    UPDATE category_price_stats
+    SET item_count = item_count - 1,
+        price_sum = price_sum - COALESCE(OLD.price, 0),
+        freight_sum = freight_sum - COALESCE(OLD.freight_value, 0)
+    WHERE product_category_name = COALESCE((SELECT p.product_category_name FROM products p WHERE p.product_id = OLD.product_id), 'unknown');
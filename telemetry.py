@@ -0,0 +1,169 @@
+"""
+Assignment 5 - Benchmark Telemetry
+PROG8850 - Database Automation
+
+Lightweight structured instrumentation for long benchmark and load runs:
+nested spans written as one JSON object per line to a trace file, plus
+counters and latency histograms served in the Prometheus text format from
+an optional local HTTP endpoint, so a run can be watched live with a
+standard scrape.
+"""
+
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Tuple
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = 'ecommerce_benchmark_'
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    """Hashable, ordered form of a label set"""
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    """Prometheus label block, e.g. {table="orders",le="0.1"}"""
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class Telemetry:
+    """Spans to a JSONL trace file, and counters/histograms for a Prometheus scrape"""
+
+    def __init__(self, trace_path: Optional[str] = None, metrics_port: Optional[int] = None,
+                 metrics_host: str = '127.0.0.1'):
+        self.trace_id = uuid.uuid4().hex
+        self.trace_file = open(trace_path, 'a', encoding='utf-8') if trace_path else None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.counters: Dict[str, Dict[tuple, float]] = {}
+        self.histograms: Dict[str, Dict[tuple, Dict]] = {}
+        self.server: Optional[ThreadingHTTPServer] = None
+        if metrics_port is not None:
+            self.start_http_server(metrics_port, metrics_host)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Dict]:
+        """Time the enclosed block as a span; its duration also feeds the span_duration_seconds histogram
+
+        The yielded dict is the span's attributes and may be extended inside the block.
+        """
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        span_id = uuid.uuid4().hex[:16]
+        parent_id = stack[-1] if stack else None
+        stack.append(span_id)
+        start_time = time.time()
+        start_counter = time.perf_counter()
+        status, error = 'ok', None
+        try:
+            yield attributes
+        except Exception as err:
+            status, error = 'error', f"{type(err).__name__}: {err}"
+            raise
+        finally:
+            duration = time.perf_counter() - start_counter
+            stack.pop()
+            self.observe('span_duration_seconds', duration, span=name)
+            if status == 'error':
+                self.increment('span_errors_total', span=name)
+            if self.trace_file is not None:
+                record = {
+                    'trace_id': self.trace_id,
+                    'span_id': span_id,
+                    'parent_id': parent_id,
+                    'name': name,
+                    'start_time': start_time,
+                    'duration_ms': duration * 1000,
+                    'thread': threading.current_thread().name,
+                    'status': status,
+                    'attributes': attributes,
+                }
+                if error:
+                    record['error'] = error
+                line = json.dumps(record, default=str)
+                with self.lock:
+                    self.trace_file.write(line + '\n')
+                    self.trace_file.flush()
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """Add to a counter"""
+        key = _label_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one value in a histogram with DURATION_BUCKETS"""
+        key = _label_key(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = {'buckets': [0] * len(DURATION_BUCKETS), 'sum': 0.0, 'count': 0}
+            for position, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][position] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def render_prometheus(self) -> str:
+        """All counters and histograms in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, histogram in sorted(series.items()):
+                    for bound, count in zip(DURATION_BUCKETS, histogram['buckets']):
+                        lines.append(f"{metric}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {count}")
+                    lines.append(f"{metric}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram['count']}")
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {histogram['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def start_http_server(self, port: int, host: str = '127.0.0.1'):
+        """Serve render_prometheus() at http://host:port/metrics from a daemon thread"""
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = telemetry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"📡 Metrics endpoint: http://{host}:{self.server.server_address[1]}/metrics")
+
+    def close(self):
+        """Stop the metrics endpoint and close the trace file"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
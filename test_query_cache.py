@@ -0,0 +1,82 @@
+"""
+Tests for the client-side query result cache
+Assignment 5 - PROG8850 - Database Automation
+"""
+
+from query_cache import QueryResultCache, referenced_tables
+
+def test_comma_separated_from_list():
+    """Every table of a comma join is referenced, not just the first"""
+    query = "SELECT * FROM orders o, order_items oi WHERE o.order_id = oi.order_id"
+    assert referenced_tables(query) == ['order_items', 'orders']
+
+def test_schema_qualified_tables():
+    """schema.table names reduce to the table, not the schema"""
+    assert referenced_tables("SELECT * FROM ecommerce_db.orders") == ['orders']
+    assert referenced_tables("SELECT * FROM `ecommerce_db`.`orders` o, ecommerce_db.order_items oi "
+                             "JOIN ecommerce_db.products p ON p.product_id = oi.product_id") == \
+        ['order_items', 'orders', 'products']
+
+def test_joins_subqueries_and_writes():
+    """JOINs, subqueries, parenthesised joins and write targets are all found"""
+    assert referenced_tables("SELECT * FROM (orders o JOIN customers c ON c.customer_id = o.customer_id), "
+                             "sellers s WHERE o.order_id IN (SELECT order_id FROM order_reviews)") == \
+        ['customers', 'order_reviews', 'orders', 'sellers']
+    assert referenced_tables("SELECT * FROM orders WHERE order_status = 'shipped from warehouse'") == ['orders']
+    assert referenced_tables("INSERT INTO ecommerce_db.orders (order_id) VALUES ('x') "
+                             "ON DUPLICATE KEY UPDATE order_status = 'x'") == ['orders']
+    assert referenced_tables("UPDATE orders o, order_items oi SET o.order_status = 'x' "
+                             "WHERE o.order_id = oi.order_id") == ['order_items', 'orders']
+    assert referenced_tables("SELECT * FROM orders FOR UPDATE SKIP LOCKED") == ['orders']
+
+def test_unparseable_statement_is_not_cached():
+    """A statement whose tables cannot be determined is never stored"""
+    query = "SELECT * FROM JSON_TABLE('[1]', '$[*]' COLUMNS (x INT PATH '$')) AS jt"
+    assert referenced_tables(query) is None
+
+    cache = QueryResultCache()
+    cache.put(query, None, [(1,)], 0.1)
+    assert cache.get(query) is None
+    assert cache.stats()['uncacheable'] == 1
+
+def test_write_to_second_table_invalidates_comma_join():
+    """A cached comma join is invalidated by a write to any of its tables"""
+    cache = QueryResultCache()
+    query = "SELECT * FROM orders o, order_items oi WHERE o.order_id = oi.order_id"
+    cache.put(query, None, [('a', 1)], 0.1)
+    assert cache.get(query) == [('a', 1)]
+
+    cache.table_versions.bump('order_items')
+    assert cache.get(query) is None
+    assert cache.invalidations == 1
+
+def test_write_to_schema_qualified_table_invalidates():
+    """Reads and writes of the same table match with or without a schema prefix"""
+    cache = QueryResultCache()
+    query = "SELECT COUNT(*) FROM ecommerce_db.orders"
+    cache.put(query, None, [(10,)], 0.1)
+
+    cache.table_versions.bump(*referenced_tables("DELETE FROM orders WHERE order_id = 'x'"))
+    assert cache.get(query) is None
+
+def test_same_query_in_another_database_is_a_miss():
+    """Results are scoped to the database the query ran in, and so are table versions"""
+    cache = QueryResultCache()
+    query = "SELECT COUNT(*) FROM orders"
+    cache.put(query, None, [(10,)], 0.1, 'ecommerce_db')
+    assert cache.get(query, None, 'ecommerce_db_varchar') is None
+    assert cache.get(query, None, 'ecommerce_db') == [(10,)]
+
+    cache.table_versions.bump(*referenced_tables("DELETE FROM orders", 'ecommerce_db_varchar'))
+    assert cache.get(query, None, 'ecommerce_db') == [(10,)]
+    cache.table_versions.bump(*referenced_tables("DELETE FROM ecommerce_db.orders", 'ecommerce_db_varchar'))
+    assert cache.get(query, None, 'ecommerce_db') is None
+
+def test_ddl_targets():
+    """Index DDL and multi-table statements name every table they change"""
+    assert referenced_tables("CREATE INDEX idx_order_items_price ON order_items(price)", 'ecommerce_db') == \
+        ['ecommerce_db.order_items']
+    assert referenced_tables("DROP INDEX idx_orders_status ON ecommerce_db_scaling.orders") == ['orders']
+    assert referenced_tables("ANALYZE TABLE orders, order_items") == ['order_items', 'orders']
+    assert referenced_tables("ANALYZE TABLE order_items UPDATE HISTOGRAM ON price, freight_value "
+                             "WITH 64 BUCKETS") == ['order_items']
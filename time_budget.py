@@ -0,0 +1,64 @@
+"""
+Assignment 5 - Query Time Budgets
+PROG8850 - Database Automation
+
+Per-query and per-suite time limits shared by the MySQL, Docker and SQLite
+testers. A query stopped at its limit is recorded as a CensoredTime: a
+float that only bounds the real latency from below, printed with a leading
+"≥", so a runaway query is reported instead of stalling or failing the run.
+"""
+
+import time
+from typing import Optional
+
+# MySQL errors raised when MAX_EXECUTION_TIME expires (3024) or a statement is killed (1317)
+MYSQL_TIMEOUT_ERRNOS = (3024, 1317)
+
+# Seconds the KILL QUERY watchdog waits past the budget, so MAX_EXECUTION_TIME normally fires first
+KILL_GRACE_SECONDS = 0.5
+
+class CensoredTime(float):
+    """A latency known only to be at least its value (the query hit its time budget)"""
+
+    censored = True
+
+    def __new__(cls, value: float, reason: str = 'timeout'):
+        instance = super().__new__(cls, value)
+        instance.reason = reason
+        return instance
+
+    def __format__(self, format_spec: str) -> str:
+        return '≥' + format(float(self), format_spec)
+
+    def __repr__(self) -> str:
+        return f"CensoredTime({float(self)!r}, {self.reason!r})"
+
+class TimeBudget:
+    """A per-query timeout combined with an optional deadline for the whole suite"""
+
+    def __init__(self, query_timeout: Optional[float] = None, suite_timeout: Optional[float] = None):
+        self.query_timeout = query_timeout
+        self.deadline = time.time() + suite_timeout if suite_timeout else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left in the suite budget, or None without one"""
+        return None if self.deadline is None else max(0.0, self.deadline - time.time())
+
+    def next_timeout(self) -> Optional[float]:
+        """Limit for the next query: the smaller of the per-query timeout and what is left of the suite"""
+        limits = [limit for limit in (self.query_timeout, self.remaining()) if limit is not None]
+        return min(limits) if limits else None
+
+def format_improvement(before: float, after: float) -> str:
+    """Relative improvement from before to after, e.g. "+42.10%"
+
+    A censored before time only bounds the improvement from below and a
+    censored after time only from above, so those are shown as "≥"/"≤"
+    bounds; with both sides censored nothing can be said.
+    """
+    before_censored, after_censored = isinstance(before, CensoredTime), isinstance(after, CensoredTime)
+    if before_censored and after_censored:
+        return "n/a (censored)"
+    improvement = (float(before) - float(after)) / float(before) * 100
+    bound = '≥' if before_censored else '≤' if after_censored else ''
+    return f"{bound}{improvement:+.2f}%"
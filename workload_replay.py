@@ -0,0 +1,233 @@
+"""
+Assignment 5 - Captured Workload Replay
+PROG8850 - Database Automation
+
+Replays a workload captured by the slow query log, the general query log or
+performance_schema's digest summary (see query_fingerprint.py) against the
+ecommerce schema under each index configuration. Every original connection
+gets its own replay thread and statements are issued at their original
+offsets (optionally sped up), so concurrency and pacing are preserved; the
+report compares per-digest latency across the configurations.
+"""
+
+import argparse
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import mysql.connector
+
+from performance_tester import DatabasePerformanceTester, DEFAULT_INDEXES, JOIN_INDEXES, DERIVED_INDEXES
+from query_fingerprint import (parse_slow_log, parse_general_log, read_digest_summary, events_from_digest_summary,
+                               summarize_events, query_digest, fingerprint)
+from write_workload import summarize_latencies
+
+# (label, index sets) the captured workload is replayed under
+REPLAY_INDEX_CONFIGURATIONS = [
+    ('PK/FK + FULLTEXT only', []),
+    ('Default indexes', DEFAULT_INDEXES),
+    ('Default + join + derived indexes', DEFAULT_INDEXES + JOIN_INDEXES + DERIVED_INDEXES),
+]
+
+def is_read_only(query: str) -> bool:
+    """Whether replaying a statement leaves the data unchanged"""
+    normalized = fingerprint(query)
+    return normalized.startswith(('select', 'with', '(select')) and 'for update' not in normalized
+
+def load_workload(source: str, path: Optional[str] = None, tester: Optional[DatabasePerformanceTester] = None,
+                  threads: int = 4) -> List[Dict]:
+    """Captured statement events from a 'slow' or 'general' log file, or the 'digest' summary table"""
+    if source == 'slow':
+        events = parse_slow_log(path)
+    elif source == 'general':
+        events = parse_general_log(path)
+    elif source == 'digest':
+        events = events_from_digest_summary(read_digest_summary(tester.cursor, tester.database), threads)
+    else:
+        raise ValueError(f"Unknown workload source: {source}")
+    print(f"📥 Loaded {len(events)} statements ({len(summarize_events(events))} digests) from {source} capture")
+    return events
+
+class ReplayThread(threading.Thread):
+    """Replays the statements of one original connection at their original offsets"""
+
+    def __init__(self, connection_settings: Dict[str, str], events: List[Dict], origin: float,
+                 start_time: float, speed: float):
+        super().__init__(daemon=True)
+        self.connection_settings = connection_settings
+        self.events = events
+        self.origin = origin
+        self.start_time = start_time
+        self.speed = speed
+        self.latencies: Dict[str, List[float]] = {}
+        self.max_lag = 0.0
+        self.errors = 0
+
+    def run(self):
+        """Wait for each statement's scheduled time, run it and record its latency by digest"""
+        connection = mysql.connector.connect(**self.connection_settings, autocommit=True)
+        cursor = connection.cursor()
+        try:
+            for event in self.events:
+                if self.speed > 0:
+                    scheduled = self.start_time + (event['timestamp'] - self.origin) / self.speed
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        self.max_lag = max(self.max_lag, -delay)
+                try:
+                    query_start = time.perf_counter()
+                    cursor.execute(event['query'])
+                    if cursor.with_rows:
+                        cursor.fetchall()
+                    self.latencies.setdefault(query_digest(event['query']), []).append(
+                        time.perf_counter() - query_start)
+                except mysql.connector.Error:
+                    self.errors += 1
+        finally:
+            cursor.close()
+            connection.close()
+
+def replay_workload(tester: DatabasePerformanceTester, events: List[Dict], speed: float = 1.0,
+                    include_writes: bool = False) -> Dict[str, Dict[str, float]]:
+    """Replay captured events with one thread per original connection
+
+    speed scales the original pacing (2.0 replays twice as fast, 0 issues
+    statements back to back). Writes are skipped unless include_writes is
+    set; reset with restore_tablespaces() after replaying them. Returns
+    summarize_latencies() statistics keyed by digest, plus 'all'.
+    """
+    if not include_writes:
+        events = [event for event in events if is_read_only(event['query'])]
+    if not events:
+        print("❌ No statements to replay")
+        return {}
+
+    by_thread: Dict[int, List[Dict]] = {}
+    for event in sorted(events, key=lambda event: event['timestamp']):
+        by_thread.setdefault(event['thread_id'], []).append(event)
+
+    connection_settings = {'host': tester.host, 'user': tester.user, 'password': tester.password,
+                           'database': tester.database}
+    origin = min(event['timestamp'] for event in events)
+    # Leave the threads time to connect before the first statement is due
+    start_time = time.perf_counter() + 0.5
+    threads = [ReplayThread(connection_settings, thread_events, origin, start_time, speed)
+               for thread_events in by_thread.values()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start_time
+
+    latencies: Dict[str, List[float]] = {}
+    for thread in threads:
+        for digest, values in thread.latencies.items():
+            latencies.setdefault(digest, []).extend(values)
+    summary = summarize_latencies(latencies, elapsed)
+
+    errors = sum(thread.errors for thread in threads)
+    print(f"   Replayed {len(events)} statements on {len(threads)} connections in {elapsed:.2f}s "
+          f"(max lag behind schedule {max(thread.max_lag for thread in threads) * 1000:.1f}ms)")
+    if errors:
+        print(f"⚠️  {errors} statements failed")
+    if include_writes:
+        tester._record_writes(*(event['query'] for event in events if not is_read_only(event['query'])))
+    return summary
+
+def compare_index_configurations(tester: DatabasePerformanceTester, events: List[Dict],
+                                 configurations: Optional[List[Tuple[str, list]]] = None, speed: float = 1.0,
+                                 include_writes: bool = False, snapshot: Optional[str] = None,
+                                 top: int = 10) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Replay the captured workload under each index configuration and compare the top digests
+
+    Each configuration's indexes are checked against
+    information_schema.STATISTICS before replaying; DEFAULT_INDEXES are left
+    in place afterwards. Replayed writes would otherwise carry over into the
+    next configuration, so with include_writes the data is reset to the
+    tablespace snapshot named snapshot before each configuration and at the
+    end; without a snapshot only a single configuration may replay writes.
+    """
+    print("🔁 Replaying Captured Workload (per index configuration)")
+    print("=" * 50)
+
+    configurations = configurations or REPLAY_INDEX_CONFIGURATIONS
+    if include_writes and snapshot is None and len(configurations) > 1:
+        print("❌ Replaying writes under several configurations needs a tablespace snapshot to restore")
+        return {}
+    all_index_sets = DEFAULT_INDEXES + JOIN_INDEXES + DERIVED_INDEXES
+    captured = summarize_events(events)
+
+    results = {}
+    for label, index_set in configurations:
+        print(f"\n📐 Configuration: {label}")
+        if include_writes and snapshot is not None and not tester.restore_tablespaces(snapshot):
+            print(f"❌ Could not restore snapshot '{snapshot}'; stopping before '{label}'")
+            break
+        tester.drop_indexes(all_index_sets)
+        if index_set:
+            tester.create_indexes(index_set)
+        if not tester.check_index_configuration(index_set, all_index_sets):
+            print(f"⚠️  Indexes do not match '{label}'; its results are not comparable")
+        results[label] = replay_workload(tester, events, speed, include_writes)
+
+    if include_writes and snapshot is not None:
+        tester.restore_tablespaces(snapshot)
+    tester.drop_indexes(all_index_sets)
+    tester.create_indexes(DEFAULT_INDEXES)
+
+    results = {label: summary for label, summary in results.items() if summary}
+    if results:
+        print(f"\n📈 TOP {top} DIGESTS BY REPLAYED TIME")
+        print("=" * 40)
+        first = next(iter(results.values()))
+        ranked = sorted((digest for digest in first if digest != 'all'),
+                        key=lambda digest: -first[digest]['mean_ms'] * first[digest]['count'])
+        for digest in ranked[:top]:
+            captured_stats = captured.get(digest, {})
+            print(f"  [{digest}] {captured_stats.get('fingerprint', '')[:100]}")
+            if captured_stats.get('total_time'):
+                print(f"    Captured: {captured_stats['count']} runs, mean {captured_stats['mean_time'] * 1000:.2f}ms")
+            for label, summary in results.items():
+                if digest in summary:
+                    stats = summary[digest]
+                    print(f"    {label}: mean {stats['mean_ms']:.2f}ms, p95 {stats['p95_ms']:.2f}ms")
+        print("\n  Whole workload:")
+        for label, summary in results.items():
+            print(f"    {label}: {summary['all']['tps']:.1f} statements/s, p95 {summary['all']['p95_ms']:.2f}ms")
+
+    return results
+
+def main():
+    """Replay a captured workload against the Docker MySQL database"""
+    parser = argparse.ArgumentParser(description="Replay a captured MySQL workload under each index configuration")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--slow-log', help="Slow query log file (long_query_time=0 captures every statement)")
+    source.add_argument('--general-log', help="General query log file")
+    source.add_argument('--digest-table', action='store_true',
+                        help="Use performance_schema.events_statements_summary_by_digest of the database")
+    parser.add_argument('--speed', type=float, default=1.0, help="Pacing multiplier; 0 replays back to back")
+    parser.add_argument('--threads', type=int, default=4, help="Replay connections for --digest-table")
+    parser.add_argument('--include-writes', action='store_true', help="Also replay data-changing statements")
+    parser.add_argument('--snapshot', help="Tablespace snapshot restored before each configuration "
+                                           "(required with --include-writes)")
+    parser.add_argument('--top', type=int, default=10, help="Digests to show in the report")
+    args = parser.parse_args()
+
+    tester = DatabasePerformanceTester()
+    try:
+        tester.connect()
+        if args.slow_log:
+            events = load_workload('slow', args.slow_log)
+        elif args.general_log:
+            events = load_workload('general', args.general_log)
+        else:
+            events = load_workload('digest', tester=tester, threads=args.threads)
+        compare_index_configurations(tester, events, speed=args.speed, include_writes=args.include_writes,
+                                     snapshot=args.snapshot, top=args.top)
+    finally:
+        tester.disconnect()
+
+if __name__ == "__main__":
+    main()
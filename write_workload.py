@@ -0,0 +1,296 @@
+"""
+Assignment 5 - Write-Path Benchmark
+PROG8850 - Database Automation
+
+Measures what the indexes cost on writes: new orders with items and payments,
+order status updates and review inserts (which maintain the FULLTEXT index)
+are run as transactions under each index configuration, reporting
+transactions/sec and latency percentiles.
+"""
+
+import argparse
+import random
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import mysql.connector
+import numpy as np
+
+from performance_tester import DatabasePerformanceTester, DEFAULT_INDEXES, JOIN_INDEXES, DERIVED_INDEXES
+
+# Share of each transaction type in the write mix
+WRITE_MIX = {'new_order': 0.5, 'status_update': 0.3, 'review_insert': 0.2}
+
+# Status an order moves to on each update, and the timestamp column that records it
+ORDER_STATUS_FLOW = [
+    ('approved', 'order_approved_at'),
+    ('shipped', 'order_delivered_carrier_date'),
+    ('delivered', 'order_delivered_customer_date'),
+]
+
+PAYMENT_TYPES = ['credit_card', 'boleto', 'voucher', 'debit_card']
+
+# Vocabulary for generated review text, so inserts feed real tokens into the FULLTEXT index
+REVIEW_WORDS = ['produto', 'entrega', 'rapida', 'otimo', 'bom', 'ruim', 'recomendo', 'qualidade',
+                'chegou', 'prazo', 'atrasado', 'excelente', 'vendedor', 'embalagem', 'perfeito',
+                'defeito', 'satisfeito', 'nao', 'recebi', 'gostei']
+
+# (label, index sets, keep the FULLTEXT index) measured by run_write_benchmark()
+WRITE_INDEX_CONFIGURATIONS = [
+    ('PK/FK + FULLTEXT only', [], True),
+    ('Default indexes', DEFAULT_INDEXES, True),
+    ('Default + join + derived indexes', DEFAULT_INDEXES + JOIN_INDEXES + DERIVED_INDEXES, True),
+]
+
+# InnoDB names an unnamed FULLTEXT index after its first column
+FULLTEXT_INDEX_NAME = 'review_comment_title'
+
+def load_reference_ids(cursor, sample_size: int = 1000) -> Dict[str, List[str]]:
+    """Sample existing customer, product and seller ids for the foreign keys of new orders"""
+    reference_ids = {}
+    for table_name, column in (('customers', 'customer_id'), ('products', 'product_id'), ('sellers', 'seller_id')):
+        cursor.execute(f"SELECT {column} FROM {table_name} LIMIT {int(sample_size)}")
+        reference_ids[table_name] = [row[0] for row in cursor.fetchall()]
+    return reference_ids
+
+def summarize_latencies(latencies: Dict[str, List[float]], elapsed: float) -> Dict[str, Dict[str, float]]:
+    """Transactions/sec and mean/p50/p95/p99 latency (ms) per transaction type and overall"""
+    summary = {}
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    for name, values in list(latencies.items()) + [('all', all_latencies)]:
+        if not values:
+            continue
+        values_ms = np.array(values) * 1000
+        summary[name] = {
+            'count': len(values),
+            'tps': len(values) / elapsed if elapsed > 0 else 0.0,
+            'mean_ms': float(values_ms.mean()),
+            'p50_ms': float(np.percentile(values_ms, 50)),
+            'p95_ms': float(np.percentile(values_ms, 95)),
+            'p99_ms': float(np.percentile(values_ms, 99)),
+        }
+    return summary
+
+class WriteWorkload:
+    """Generates and runs the write transactions on one connection"""
+
+    def __init__(self, connection, reference_ids: Dict[str, List[str]], seed: Optional[int] = None,
+                 created_orders: Optional[List[str]] = None, order_progress: Optional[Dict[str, int]] = None,
+                 shared_lock: Optional[threading.Lock] = None):
+        """Use an open MySQL connection; reference_ids come from load_reference_ids()
+        
+        Workloads on several connections can pass the same created_orders list,
+        order_progress dict and shared_lock so they update and review each
+        other's orders; the lock guards every access to the shared state.
+        """
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.reference_ids = reference_ids
+        self.random = random.Random(seed)
+        self.created_orders: List[str] = created_orders if created_orders is not None else []
+        self.order_progress: Dict[str, int] = order_progress if order_progress is not None else {}
+        self.created_reviews: List[str] = []
+        self.lock = shared_lock or threading.Lock()
+
+    def _transaction(self, statements: Sequence[Tuple[str, tuple]]) -> float:
+        """Run statements in one transaction and return its latency in seconds"""
+        start_time = time.perf_counter()
+        self.connection.start_transaction()
+        try:
+            for sql, params in statements:
+                self.cursor.execute(sql, params)
+            self.connection.commit()
+        except mysql.connector.Error:
+            self.connection.rollback()
+            raise
+        return time.perf_counter() - start_time
+
+    def new_order(self) -> float:
+        """Insert an order with 1-4 items and one payment"""
+        order_id = uuid.uuid4().hex
+        customer_id = self.random.choice(self.reference_ids['customers'])
+        statements = [(
+            "INSERT INTO orders (order_id, customer_id, order_status, order_purchase_timestamp, "
+            "order_estimated_delivery_date) VALUES (%s, %s, 'created', NOW(), NOW() + INTERVAL 20 DAY)",
+            (order_id, customer_id),
+        )]
+        total = 0.0
+        for item_id in range(1, self.random.randint(1, 4) + 1):
+            price = round(self.random.uniform(10, 500), 2)
+            freight = round(self.random.uniform(5, 50), 2)
+            total += price + freight
+            statements.append((
+                "INSERT INTO order_items (order_id, order_item_id, product_id, seller_id, shipping_limit_date, "
+                "price, freight_value) VALUES (%s, %s, %s, %s, NOW() + INTERVAL 5 DAY, %s, %s)",
+                (order_id, item_id, self.random.choice(self.reference_ids['products']),
+                 self.random.choice(self.reference_ids['sellers']), price, freight),
+            ))
+        statements.append((
+            "INSERT INTO order_payments (order_id, payment_sequential, payment_type, payment_installments, "
+            "payment_value) VALUES (%s, 1, %s, %s, %s)",
+            (order_id, self.random.choice(PAYMENT_TYPES), self.random.randint(1, 10), round(total, 2)),
+        ))
+
+        latency = self._transaction(statements)
+        with self.lock:
+            self.created_orders.append(order_id)
+            self.order_progress[order_id] = 0
+        return latency
+
+    def status_update(self) -> float:
+        """Move one of the generated orders to its next status"""
+        with self.lock:
+            open_orders = [order_id for order_id, step in self.order_progress.items()
+                           if step < len(ORDER_STATUS_FLOW)]
+            if open_orders:
+                order_id = self.random.choice(open_orders)
+                step = self.order_progress[order_id]
+                # Claim the step so no other workload moves the order to the same status
+                self.order_progress[order_id] = step + 1
+        if not open_orders:
+            return self.new_order()
+        status, timestamp_column = ORDER_STATUS_FLOW[step]
+
+        try:
+            return self._transaction([(
+                f"UPDATE orders SET order_status = %s, {timestamp_column} = NOW() WHERE order_id = %s",
+                (status, order_id),
+            )])
+        except mysql.connector.Error:
+            with self.lock:
+                if self.order_progress.get(order_id) == step + 1:
+                    self.order_progress[order_id] = step
+            raise
+
+    def review_insert(self) -> float:
+        """Insert a review with generated text for one of the generated orders"""
+        with self.lock:
+            order_id = self.random.choice(self.created_orders) if self.created_orders else None
+        if order_id is None:
+            return self.new_order()
+        review_id = uuid.uuid4().hex
+        title = ' '.join(self.random.choices(REVIEW_WORDS, k=2))
+        message = ' '.join(self.random.choices(REVIEW_WORDS, k=self.random.randint(5, 25)))
+
+        latency = self._transaction([(
+            "INSERT INTO order_reviews (review_id, order_id, review_score, review_comment_title, "
+            "review_comment_message, review_creation_date, review_answer_timestamp) "
+            "VALUES (%s, %s, %s, %s, %s, NOW(), NOW())",
+            (review_id, order_id, self.random.randint(1, 5), title, message),
+        )])
+        self.created_reviews.append(review_id)
+        return latency
+
+    def next_transaction(self, mix: Optional[Dict[str, float]] = None) -> str:
+        """Pick the next transaction type according to the mix weights"""
+        mix = mix or WRITE_MIX
+        return self.random.choices(list(mix), weights=list(mix.values()))[0]
+
+    def run(self, transactions: int = 500, mix: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, float]]:
+        """Run a number of transactions and summarise throughput and latency"""
+        latencies = {name: [] for name in (mix or WRITE_MIX)}
+        start_time = time.perf_counter()
+        for _ in range(transactions):
+            kind = self.next_transaction(mix)
+            latencies[kind].append(getattr(self, kind)())
+        return summarize_latencies(latencies, time.perf_counter() - start_time)
+
+    def cleanup(self):
+        """Delete every row the workload created"""
+        with self.lock:
+            created_orders = list(self.created_orders)
+        for start in range(0, len(created_orders), 500):
+            order_ids = created_orders[start:start + 500]
+            placeholders = ', '.join(['%s'] * len(order_ids))
+            for table_name in ('order_reviews', 'order_payments', 'order_items', 'orders'):
+                self.cursor.execute(f"DELETE FROM {table_name} WHERE order_id IN ({placeholders})", order_ids)
+        self.connection.commit()
+        self.created_orders, self.order_progress, self.created_reviews = [], {}, []
+
+def run_write_benchmark(tester: DatabasePerformanceTester, transactions: int = 500,
+                        configurations: Optional[List[Tuple[str, list, bool]]] = None,
+                        include_fulltext_toggle: bool = True) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Run the write mix under each index configuration
+
+    Every configuration starts from the schema's own keys (PK/FK and the
+    FULLTEXT index) plus its index sets. With include_fulltext_toggle the
+    default indexes are also measured without the FULLTEXT index, which is
+    rebuilt afterwards. Each configuration's indexes are checked against
+    information_schema.STATISTICS before it runs. Generated rows are deleted
+    after each run and DEFAULT_INDEXES are left in place.
+    """
+    print("✍️  Running Write Workload Benchmark (transactions per index configuration)")
+    print("=" * 50)
+
+    configurations = list(configurations or WRITE_INDEX_CONFIGURATIONS)
+    if include_fulltext_toggle:
+        configurations.append(('Default indexes, no FULLTEXT', DEFAULT_INDEXES, False))
+    all_index_sets = DEFAULT_INDEXES + JOIN_INDEXES + DERIVED_INDEXES
+
+    reference_ids = load_reference_ids(tester.cursor)
+    if not all(reference_ids.values()):
+        print("❌ customers, products and sellers must be loaded before running the write workload")
+        return {}
+
+    results = {}
+    for label, index_set, keep_fulltext in configurations:
+        print(f"\n📐 Configuration: {label}")
+        tester.drop_indexes(all_index_sets)
+        if index_set:
+            tester.create_indexes(index_set)
+        if not keep_fulltext:
+            tester.cursor.execute(f"ALTER TABLE order_reviews DROP INDEX {FULLTEXT_INDEX_NAME}")
+        if not tester.check_index_configuration(index_set, all_index_sets):
+            print(f"⚠️  Indexes do not match '{label}'; its results are not comparable")
+
+        workload = WriteWorkload(tester.connection, reference_ids, seed=42)
+        try:
+            results[label] = workload.run(transactions)
+        except mysql.connector.Error as err:
+            print(f"❌ Error running write workload: {err}")
+        finally:
+            workload.cleanup()
+            if not keep_fulltext:
+                tester.cursor.execute("ALTER TABLE order_reviews ADD FULLTEXT(review_comment_title, review_comment_message)")
+            tester._bump_table_versions('orders', 'order_items', 'order_payments', 'order_reviews')
+
+        for name, stats in results.get(label, {}).items():
+            print(f"   {name}: {stats['count']} tx, {stats['tps']:.1f} tx/s, mean {stats['mean_ms']:.2f}ms, "
+                  f"p95 {stats['p95_ms']:.2f}ms, p99 {stats['p99_ms']:.2f}ms")
+
+    tester.drop_indexes(all_index_sets)
+    tester.create_indexes(DEFAULT_INDEXES)
+    tester.check_index_configuration(DEFAULT_INDEXES, all_index_sets)
+
+    if results:
+        print("\n📈 WRITE THROUGHPUT BY INDEX CONFIGURATION")
+        print("=" * 40)
+        baseline = next(iter(results.values()))['all']
+        for label, summary in results.items():
+            overall = summary['all']
+            change = ((overall['tps'] - baseline['tps']) / baseline['tps']) * 100 if baseline['tps'] else 0.0
+            print(f"  {label}:")
+            print(f"    {overall['tps']:.1f} tx/s, p95 {overall['p95_ms']:.2f}ms")
+            print(f"    Throughput vs {next(iter(results))}: {change:+.2f}%")
+
+    return results
+
+def main():
+    """Run the write-path benchmark against the Docker MySQL database"""
+    parser = argparse.ArgumentParser(description="Write-path cost of each index configuration")
+    parser.add_argument('--transactions', type=int, default=500, help="Transactions per index configuration")
+    parser.add_argument('--skip-fulltext-toggle', action='store_true',
+                        help="Do not measure the configuration without the FULLTEXT index")
+    args = parser.parse_args()
+
+    tester = DatabasePerformanceTester()
+    try:
+        tester.connect()
+        run_write_benchmark(tester, args.transactions, include_fulltext_toggle=not args.skip_fulltext_toggle)
+    finally:
+        tester.disconnect()
+
+if __name__ == "__main__":
+    main()